@@ -93,6 +93,8 @@ from arcsilib import ARCSI_SENSORS_LIST
 from arcsilib import ARCSI_PRODUCTS_LIST
 # Import the multiprocessing Pool module
 from multiprocessing import Pool
+# Import the multiprocessing module
+import multiprocessing
 
 
 class ARCSIParamsObj (object):
@@ -1261,11 +1263,39 @@ def exportMetaData(paramsObj):
         paramsObj.prodsCalculated["METADATA"] = True
         print("")
 
+def setGDALNumThreads(ncores=1):
+    """
+    A function which sets the number of threads GDAL uses for multi-threaded
+    warping and block (de)compression from the ARCSI_GDAL_NUM_THREADS
+    environmental variable (a number or ALL_CPUS). GDAL is left unchanged
+    if it is not set. Where ncores scenes are processed at once the number
+    of threads is capped at the number of CPUs divided by ncores.
+    """
+    arcsiUtils = ARCSIUtils()
+    numThreads = arcsiUtils.getEnvironmentVariable("ARCSI_GDAL_NUM_THREADS")
+    if (numThreads is None) or (numThreads.strip() == ""):
+        return
+    numThreads = numThreads.strip().upper()
+    if numThreads != "ALL_CPUS":
+        try:
+            numThreads = int(numThreads)
+        except ValueError:
+            raise ARCSIException("ARCSI_GDAL_NUM_THREADS must be a number or ALL_CPUS; got '{}'".format(numThreads))
+        if numThreads < 1:
+            raise ARCSIException("ARCSI_GDAL_NUM_THREADS must be at least 1; got '{}'".format(numThreads))
+    if ncores > 1:
+        maxThreads = max(1, multiprocessing.cpu_count() // ncores)
+        numThreads = maxThreads if numThreads == "ALL_CPUS" else min(numThreads, maxThreads)
+    gdal.SetConfigOption('GDAL_NUM_THREADS', str(numThreads))
+
 def runARCSI(inputHeader, inputImage, cloudMaskUsrImg, sensorStr, inWKTFile, outFormat, outFilePath, outBaseName, outWKTFile, outProj4File, projAbbv, xPxlResUsr, yPxlResUsr, productsStr, calcStatsPy, aeroProfileOption, atmosProfileOption, aeroProfileOptionImg, atmosProfileOptionImg,  grdReflOption, surfaceAltitude, atmosOZoneVal,atmosWaterVal, atmosOZoneWaterSpecified, aeroWaterVal, aeroDustVal, aeroOceanicVal, aeroSootVal, aeroComponentsSpecified, aotVal, visVal, tmpPath, minAOT, maxAOT, lowAOT, upAOT, demFile, demNoDataUsrVal, aotFile, globalDOS, dosOutRefl, simpleDOS, debugMode, scaleFactor, interpAlgor, interpAlgorResample, initClearSkyRegionDist, initClearSkyRegionMinSize, finalClearSkyRegionDist, clearSkyMorphSize, fullImgOuts, checkOutputs, classmlclouds, cloudtrainclouds, cloudtrainother, resample2LowResImg, fileEnding2Keep, cloud_methods):
     """
     A function contains the main flow of the software
     """
     try:
+        # Set the number of GDAL threads, if requested.
+        setGDALNumThreads()
+
         # Initialise and parameters object.
         paramsObj = None
         paramsObj = prepParametersObj(inputHeader, inputImage, cloudMaskUsrImg, sensorStr, inWKTFile, outFormat, outFilePath, outBaseName, outWKTFile, outProj4File, projAbbv, xPxlResUsr, yPxlResUsr, productsStr, calcStatsPy, aeroProfileOption, atmosProfileOption, aeroProfileOptionImg, atmosProfileOptionImg,  grdReflOption, surfaceAltitude, atmosOZoneVal,atmosWaterVal, atmosOZoneWaterSpecified, aeroWaterVal, aeroDustVal, aeroOceanicVal, aeroSootVal, aeroComponentsSpecified, aotVal, visVal, tmpPath, minAOT, maxAOT, lowAOT, upAOT, demFile, demNoDataUsrVal, aotFile, globalDOS, dosOutRefl, simpleDOS, debugMode, scaleFactor, interpAlgor, interpAlgorResample, initClearSkyRegionDist, initClearSkyRegionMinSize, finalClearSkyRegionDist, clearSkyMorphSize, fullImgOuts, checkOutputs, classmlclouds, cloudtrainclouds, cloudtrainother, resample2LowResImg, fileEnding2Keep, cloud_methods)
@@ -1524,7 +1554,11 @@ def runARCSIMulti(inputHeaders, sensorStr, inWKTFile, outFormat, outFilePath, ou
                     exportMetaData = True
                 first = False
 
-        plObj = Pool(ncores)
+        # Each process sets the number of GDAL threads, if requested, capped so
+        # the ncores processes together do not use more than the number of CPUs.
+        # It is called here first so an invalid value is reported before the pool starts.
+        setGDALNumThreads(ncores)
+        plObj = Pool(ncores, initializer=setGDALNumThreads, initargs=(ncores,))
         paramsLst = plObj.map(_runARCSIPart1, paramsLst)
         
         if calcAOT:
@@ -1616,4 +1650,12 @@ def print2ConsoleListEnvVars():
     print("ARCSI_USE_SIMPLEDOS    in place of the --simpledos (variable ")
     print("                       values can be either `TRUE' or `FALSE') option")
     print("ARCSI_SCALE_FACTOR     in place of the --scalefac option")
+    print("ARCSI_6S_LUT_CACHE_DIR directory in which the elevation/AOT 6S LUTs ")
+    print("                       are saved and reused when a scene is processed")
+    print("                       again with the same parameters (no option; ")
+    print("                       the LUTs are not cached if it is not set)")
+    print("ARCSI_GDAL_NUM_THREADS number of threads (or ALL_CPUS) GDAL uses for")
+    print("                       warping and block (de)compression (no option;")
+    print("                       GDAL's default is used if it is not set). With")
+    print("                       --multi it is capped to the CPUs / --ncores")
     print("")
@@ -61,6 +61,12 @@ import collections
 import sys
 # Import python math module
 import math
+# Import python hashlib module
+import hashlib
+# Import python multiprocessing module
+import multiprocessing
+# Import the thread pool from the python multiprocessing module
+import multiprocessing.pool
 # Import the rsgislib module
 import rsgislib
 # Import the rsgislib imagecalc module
@@ -119,6 +125,11 @@ class ARCSIAbstractSensor (object):
     """
     __metaclass__ = ABCMeta
 
+    # Spatial references and transformations to WGS84 lat/long for the
+    # projections, shared across instances and keyed by EPSG code (or 'PS').
+    _projSRSCache = dict()
+    _projCTCache = dict()
+
     def __init__(self, debugMode, inputImage):
         self.sensor = "NA"
         self.headerFileName = ""
@@ -151,6 +162,9 @@ class ARCSIAbstractSensor (object):
         self.solarAzimuth = 0.0
         self.sensorZenith = 0.0
         self.sensorAzimuth = 0.0
+        # Number of 6S processes each calc6SCoefficients call runs at once
+        # (one per band for sensors which run their bands as a batch).
+        self.num6SBandProcs = 1
         self.epsgCodes = dict()
         self.epsgCodes["WGS84UTM1N"] = 32601
         self.epsgCodes["WGS84UTM2N"] = 32602
@@ -282,6 +296,66 @@ class ARCSIAbstractSensor (object):
     def getReProjectOutputs(self, reproj=False):
         return self.reprojectOutputs
 
+    def getUTMProjTransform(self, utmZone):
+        """
+        Get the spatial reference for a WGS84 UTM zone and the transformation
+        from it to WGS84 lat/long. Both are created on first use and cached on
+        the class so later scenes reuse them. The transformation returns
+        coordinates in long/lat order. The hemisphere is taken from the top
+        left corner (self.latTL and self.yTL), which must already be set.
+        """
+        # WGS84 UTM zones are EPSG:32601-32660 (north) and EPSG:32701-32760 (south).
+        # USGS products use the north zone with negative northings for southern
+        # scenes, so a south zone needs the corner to also have a positive northing.
+        if (self.latTL < 0) and (self.yTL > 0):
+            epsgCode = 32700 + utmZone
+        else:
+            epsgCode = 32600 + utmZone
+        if epsgCode not in ARCSIAbstractSensor._projCTCache:
+            inProj = osr.SpatialReference()
+            inProj.ImportFromEPSG(epsgCode)
+            self._cacheProjTransform(epsgCode, inProj)
+        return ARCSIAbstractSensor._projSRSCache[epsgCode], ARCSIAbstractSensor._projCTCache[epsgCode]
+
+    def getPSProjTransform(self):
+        """
+        Get the spatial reference for the WGS84 polar stereographic projection
+        used for Landsat over Antarctica and the transformation from it to WGS84
+        lat/long, cached on the class in the same way as getUTMProjTransform.
+        """
+        if 'PS' not in ARCSIAbstractSensor._projCTCache:
+            inProj = osr.SpatialReference()
+            inProj.ImportFromWkt("PROJCS[\"PS WGS84\", GEOGCS[\"WGS 84\",DATUM[\"WGS_1984\",SPHEROID[\"WGS 84\",6378137,298.257223563, AUTHORITY[\"EPSG\",\"7030\"]],AUTHORITY[\"EPSG\",\"6326\"]],PRIMEM[\"Greenwich\",0],UNIT[\"degree\",0.0174532925199433],AUTHORITY[\"EPSG\",\"4326\"]],PROJECTION[\"Polar_Stereographic\"],PARAMETER[\"latitude_of_origin\",-71],PARAMETER[\"central_meridian\",0],PARAMETER[\"scale_factor\",1],PARAMETER[\"false_easting\",0],PARAMETER[\"false_northing\",0],UNIT[\"metre\",1,AUTHORITY[\"EPSG\",\"9001\"]]]")
+            self._cacheProjTransform('PS', inProj)
+        return ARCSIAbstractSensor._projSRSCache['PS'], ARCSIAbstractSensor._projCTCache['PS']
+
+    def _cacheProjTransform(self, projKey, inProj):
+        """
+        Cache inProj and the transformation from it to WGS84 lat/long
+        (in long/lat order) on the class under projKey.
+        """
+        inProj.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        wgs84latlonProj = osr.SpatialReference()
+        wgs84latlonProj.ImportFromEPSG(4326)
+        wgs84latlonProj.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+        ARCSIAbstractSensor._projSRSCache[projKey] = inProj
+        ARCSIAbstractSensor._projCTCache[projKey] = osr.CoordinateTransformation(inProj, wgs84latlonProj)
+
+    def setProjCentreLatLong(self, latLongTrans):
+        """
+        Check the image is square in projected coordinates, set the projected
+        centre (xCentre, yCentre) and reproject it to WGS84 (latCentre, lonCentre)
+        with latLongTrans. The projected corners (xTL, yTL, ...) must already be set.
+        """
+        # Check image is square!
+        if (self.xTL, self.yTL, self.xTR, self.yBL) != (self.xBL, self.yTR, self.xBR, self.yBR):
+            raise ARCSIException("Image is not square in projected coordinates.")
+
+        self.xCentre = self.xTL + ((self.xTR - self.xTL)/2)
+        self.yCentre = self.yBR + ((self.yTL - self.yBR)/2)
+
+        self.lonCentre, self.latCentre, _ = latLongTrans.TransformPoint(self.xCentre, self.yCentre)
+
     @abstractmethod
     def getSolarIrrStdSolarGeom(self): pass
 
@@ -1028,39 +1102,103 @@ class ARCSIAbstractSensor (object):
     @abstractmethod
     def calc6SCoefficients(self, aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal): pass
 
+    def get6SBandCoeffs(self, sixsCoeffs):
+        """
+        Convert an array of 6S coefficients (one row per band) into the
+        list of rsgislib Band6SCoeff objects used to apply them.
+        """
+        return [rsgislib.imagecalibration.Band6SCoeff(band=i+1, aX=aX, bX=bX, cX=cX, DirIrr=dirIrr, DifIrr=difIrr, EnvIrr=envIrr) for i, (aX, bX, cX, dirIrr, difIrr, envIrr) in enumerate(sixsCoeffs.tolist())]
+
+    def get6SLUTPoolSize(self, numLUTEntries):
+        """
+        Number of threads to use to build a 6S LUT with numLUTEntries calls
+        to calc6SCoefficients, such that the number of 6S processes running
+        at once (threads x num6SBandProcs) does not exceed the number of CPUs.
+        """
+        return max(1, min(numLUTEntries, multiprocessing.cpu_count() // self.num6SBandProcs))
+
     def buildElevation6SCoeffLUT(self, aeroProfile, atmosProfile, grdRefl, aotVal, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax):
-        lut = list()
         elevRange = (surfaceAltitudeMax - surfaceAltitudeMin) / 100
         numElevSteps = int(math.ceil(elevRange) + 1)
-        elevVal = surfaceAltitudeMin
-        for i in range(numElevSteps):
+        elevVals = [surfaceAltitudeMin + (i * 100) for i in range(numElevSteps)]
+
+        def calcElevCoeffs(elevVal):
             print("Building LUT Elevation ", elevVal)
-            lut.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=elevVal, Coeffs=self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, (float(elevVal)/1000), aotVal, useBRDF)))
-            elevVal = elevVal + 100
+            return self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, (float(elevVal)/1000), aotVal, useBRDF)
+
+        # Each elevation is an independent set of 6S runs (external processes)
+        # so a thread pool is used; the scenes may already be running within a
+        # multiprocessing pool, whose workers cannot start their own processes.
+        pool = multiprocessing.pool.ThreadPool(processes=self.get6SLUTPoolSize(numElevSteps))
+        try:
+            elevCoeffs = pool.map(calcElevCoeffs, elevVals)
+        finally:
+            pool.close()
+            pool.join()
+        lut = [rsgislib.imagecalibration.ElevLUTFeat(Elev=elevVal, Coeffs=coeffs) for elevVal, coeffs in zip(elevVals, elevCoeffs)]
         return lut
 
     @abstractmethod
     def convertImageToSurfaceReflDEMElevLUT(self, inputRadImage, inputDEMFile, outputPath, outputName, outFormat, aeroProfile, atmosProfile, grdRefl, aotVal, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax, scaleFactor, elevCoeffs=None): pass
 
     def buildElevationAOT6SCoeffLUT(self, aeroProfile, atmosProfile, grdRefl, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax, aotMin, aotMax):
-        lut = list()
+        # If the ARCSI_6S_LUT_CACHE_DIR environment variable is set, LUTs are
+        # saved there and reused when the same scene is processed again with
+        # the same parameters (the 6S runs depend only on these values).
+        lutCacheFile = None
+        lutCacheDIR = os.environ.get("ARCSI_6S_LUT_CACHE_DIR", "")
+        if lutCacheDIR != "":
+            lutParams = (self.sensor, self.acquisitionTime.isoformat(), self.latCentre, self.lonCentre, str(aeroProfile), str(atmosProfile), str(grdRefl), useBRDF, surfaceAltitudeMin, surfaceAltitudeMax, aotMin, aotMax)
+            lutCacheFile = os.path.join(lutCacheDIR, "elevaot6slut_" + hashlib.sha1(repr(lutParams).encode('utf-8')).hexdigest() + ".npz")
+            if os.path.exists(lutCacheFile):
+                print("Reading LUT from cache: ", lutCacheFile)
+                lut = list()
+                with numpy.load(lutCacheFile) as lutData:
+                    for elevVal, aotVals, elevCoeffs in zip(lutData['elev'].tolist(), lutData['aot'].tolist(), lutData['coeffs']):
+                        aotCoeffLUT = [rsgislib.imagecalibration.AOTLUTFeat(AOT=aotVal, Coeffs=aotCoeffs) for aotVal, aotCoeffs in zip(aotVals, elevCoeffs)]
+                        lut.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=elevVal, Coeffs=aotCoeffLUT))
+                return lut
+
         elevRange = (surfaceAltitudeMax - surfaceAltitudeMin) / 100
         numElevSteps = int(math.ceil(elevRange) + 1)
-        elevVal = surfaceAltitudeMin
+        elevVals = [surfaceAltitudeMin + (i * 100) for i in range(numElevSteps)]
 
         aotRange = (aotMax - aotMin) / 0.05
         numAOTSteps = int(math.ceil(aotRange) + 1) + 1
-        aotVal = aotMin
+        aotVals = [aotMin]
+        for j in range(numAOTSteps-1):
+            aotVals.append(aotVals[-1] + 0.05)
+
+        def calcElevAOTCoeffs(elevAOTVal):
+            elevVal, aotVal = elevAOTVal
+            print("Building LUT Elevation ", elevVal, " AOT ", aotVal)
+            return self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, (float(elevVal)/1000), aotVal, useBRDF)
+
+        # As in buildElevation6SCoeffLUT, the independent 6S runs for each
+        # (elevation, AOT) pair are spread over a thread pool.
+        elevAOTVals = [(elevVal, aotVal) for elevVal in elevVals for aotVal in aotVals]
+        pool = multiprocessing.pool.ThreadPool(processes=self.get6SLUTPoolSize(len(elevAOTVals)))
+        try:
+            elevAOTCoeffs = pool.map(calcElevAOTCoeffs, elevAOTVals)
+        finally:
+            pool.close()
+            pool.join()
 
-        for i in range(numElevSteps):
-            print("Building LUT Elevation ", elevVal)
-            aotVal = aotMin
-            aotCoeffLUT = list()
-            for j in range(numAOTSteps):
-                aotCoeffLUT.append(rsgislib.imagecalibration.AOTLUTFeat(AOT=aotVal,  Coeffs=self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, (float(elevVal)/1000), aotVal, useBRDF)))
-                aotVal = aotVal + 0.05
+        lut = list()
+        for i, elevVal in enumerate(elevVals):
+            aotCoeffLUT = [rsgislib.imagecalibration.AOTLUTFeat(AOT=aotVal, Coeffs=elevAOTCoeffs[(i*numAOTSteps)+j]) for j, aotVal in enumerate(aotVals)]
             lut.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=elevVal, Coeffs=aotCoeffLUT))
-            elevVal = elevVal + 100
+
+        if lutCacheFile is not None:
+            # Several scenes may be processed at once, so the directory may be created by another process.
+            os.makedirs(lutCacheDIR, exist_ok=True)
+            elevVals = numpy.array([elevLUT.Elev for elevLUT in lut])
+            aotVals = numpy.array([[aotFeat.AOT for aotFeat in elevLUT.Coeffs] for elevLUT in lut])
+            lutCoeffs = numpy.array([[aotFeat.Coeffs for aotFeat in elevLUT.Coeffs] for elevLUT in lut])
+            # Write to a temporary name and rename so a partial file is never read.
+            tmpCacheFile = lutCacheFile[:-4] + "_" + ARCSIUtils().uidGenerator() + ".npz"
+            numpy.savez(tmpCacheFile, elev=elevVals, aot=aotVals, coeffs=lutCoeffs)
+            os.rename(tmpCacheFile, lutCacheFile)
         return lut
 
     @abstractmethod
@@ -50,9 +50,6 @@ from .arcsiutils import ARCSIUtils
 import datetime
 # Import the GDAL/OGR spatial reference library
 from osgeo import osr
-from osgeo import ogr
-# Import the sys module
-import sys
 # Import OS path module for manipulating the file system
 import os.path
 # Import the RSGISLib Image Calibration Module.
@@ -61,8 +58,8 @@ import rsgislib.imagecalibration
 import rsgislib.imageutils
 # Import the collections module
 import collections
-# Import the py6s module for running 6S from python.
-import Py6S
+# Import the operator module
+import operator
 # Import the python maths library
 import math
 # Import the numpy module
@@ -76,6 +73,27 @@ import json
 # Import the solar angle tools from RSGISLib
 import rsgislib.imagecalibration.solarangles
 
+# The MTL header keys used by ARCSILandsat2MSSSensor, all other keys are ignored when parsing.
+LS2MSS_HEADER_KEYS = frozenset(["SPACECRAFT_ID", "SENSOR_ID", "WRS_ROW", "WRS_PATH", "DATE_ACQUIRED", "SCENE_CENTER_TIME",
+                                "SUN_ELEVATION", "SUN_AZIMUTH", "MAP_PROJECTION", "DATUM", "ELLIPSOID", "UTM_ZONE",
+                                "CLOUD_COVER", "CLOUD_COVER_LAND", "EARTH_SUN_DISTANCE", "GRID_CELL_SIZE_REFLECTIVE", "FILE_DATE"]
+                               + ["CORNER_{0}_{1}_PRODUCT".format(corner, coord) for corner in ("UL", "UR", "LL", "LR") for coord in ("LAT", "LON", "PROJECTION_X", "PROJECTION_Y")]
+                               + ["{0}_BAND_{1}".format(field, band) for band in (4, 5, 6, 7) for field in ("FILE_NAME", "QUANTIZE_CAL_MIN", "QUANTIZE_CAL_MAX", "RADIANCE_MINIMUM", "RADIANCE_MAXIMUM")])
+
+# Band definition types passed to the RSGISLib calibration functions.
+LSBandRad = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
+LSBandSat = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
+SolarIrradiance = collections.namedtuple('SolarIrradiance', ['irradiance'])
+
+# Solar irradiance for the four Landsat 2 MSS bands.
+LS2MSS_SOLAR_IRRADIANCE = (SolarIrradiance(irradiance=1829.0), SolarIrradiance(irradiance=1539.0), SolarIrradiance(irradiance=1268.0), SolarIrradiance(irradiance=886.6))
+
+# Fetches the geographic then projected corner values from the header, in the order they are unpacked.
+LS2MSS_CORNER_KEYS = operator.itemgetter("CORNER_UL_LAT_PRODUCT", "CORNER_UL_LON_PRODUCT", "CORNER_UR_LAT_PRODUCT", "CORNER_UR_LON_PRODUCT",
+                                         "CORNER_LL_LAT_PRODUCT", "CORNER_LL_LON_PRODUCT", "CORNER_LR_LAT_PRODUCT", "CORNER_LR_LON_PRODUCT",
+                                         "CORNER_UL_PROJECTION_X_PRODUCT", "CORNER_UL_PROJECTION_Y_PRODUCT", "CORNER_UR_PROJECTION_X_PRODUCT", "CORNER_UR_PROJECTION_Y_PRODUCT",
+                                         "CORNER_LL_PROJECTION_X_PRODUCT", "CORNER_LL_PROJECTION_Y_PRODUCT", "CORNER_LR_PROJECTION_X_PRODUCT", "CORNER_LR_PROJECTION_Y_PRODUCT")
+
 class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
     """
     A class which represents the landsat 2 MSS sensor to read
@@ -84,6 +102,8 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
     def __init__(self, debugMode, inputImage):
         ARCSIAbstractSensor.__init__(self, debugMode, inputImage)
         self.sensor = "LS2MSS"
+        # calc6SCoefficients runs 6S for all the bands at once.
+        self.num6SBandProcs = 4
         self.band4File = ""
         self.band5File = ""
         self.band6File = ""
@@ -128,16 +148,10 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
             arcsiUtils = ARCSIUtils()
 
             print("Reading header file")
-            hFile = open(inputHeader, 'r')
-            headerParams = dict()
-            for line in hFile:
-                line = line.strip()
-                if line:
-                    lineVals = line.split('=')
-                    if len(lineVals) == 2:
-                        if (lineVals[0].strip() != "GROUP") or (lineVals[0].strip() != "END_GROUP"):
-                            headerParams[lineVals[0].strip()] = lineVals[1].strip().replace('"','')
-            hFile.close()
+            with open(inputHeader, 'r') as hFile:
+                headerLines = hFile.read().split('\n')
+            lineVals = [line.partition('=') for line in headerLines]
+            headerParams = {key.strip(): val.strip().strip('"') for key, sep, val in lineVals if sep and (key.strip() in LS2MSS_HEADER_KEYS)}
             print("Extracting Header Values")
             # Get the sensor info.
             if ((headerParams["SPACECRAFT_ID"].upper() == "LANDSAT_2") or (headerParams["SPACECRAFT_ID"].upper() == "LANDSAT2")) and (headerParams["SENSOR_ID"].upper() == "MSS"):
@@ -153,57 +167,30 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
             self.path = int(headerParams["WRS_PATH"])
 
             # Get date and time of the acquisition
-            acData = headerParams["DATE_ACQUIRED"].split('-')
-            acTime = headerParams["SCENE_CENTER_TIME"].split(':')
-            secsTime = acTime[2].split('.')
-            self.acquisitionTime = datetime.datetime(int(acData[0]), int(acData[1]), int(acData[2]), int(acTime[0]), int(acTime[1]), int(secsTime[0]))
+            acTimeStr = headerParams["DATE_ACQUIRED"] + " " + headerParams["SCENE_CENTER_TIME"].split('.')[0]
+            self.acquisitionTime = datetime.datetime.strptime(acTimeStr, "%Y-%m-%d %H:%M:%S")
 
             self.solarZenith = 90-arcsiUtils.str2Float(headerParams["SUN_ELEVATION"])
             self.solarAzimuth = arcsiUtils.str2Float(headerParams["SUN_AZIMUTH"])
 
-            # Get the geographic lat/long corners of the image.
-            self.latTL = arcsiUtils.str2Float(headerParams["CORNER_UL_LAT_PRODUCT"])
-            self.lonTL = arcsiUtils.str2Float(headerParams["CORNER_UL_LON_PRODUCT"])
-            self.latTR = arcsiUtils.str2Float(headerParams["CORNER_UR_LAT_PRODUCT"])
-            self.lonTR = arcsiUtils.str2Float(headerParams["CORNER_UR_LON_PRODUCT"])
-            self.latBL = arcsiUtils.str2Float(headerParams["CORNER_LL_LAT_PRODUCT"])
-            self.lonBL = arcsiUtils.str2Float(headerParams["CORNER_LL_LON_PRODUCT"])
-            self.latBR = arcsiUtils.str2Float(headerParams["CORNER_LR_LAT_PRODUCT"])
-            self.lonBR = arcsiUtils.str2Float(headerParams["CORNER_LR_LON_PRODUCT"])
-
-            # Get the projected X/Y corners of the image
-            self.xTL = arcsiUtils.str2Float(headerParams["CORNER_UL_PROJECTION_X_PRODUCT"])
-            self.yTL = arcsiUtils.str2Float(headerParams["CORNER_UL_PROJECTION_Y_PRODUCT"])
-            self.xTR = arcsiUtils.str2Float(headerParams["CORNER_UR_PROJECTION_X_PRODUCT"])
-            self.yTR = arcsiUtils.str2Float(headerParams["CORNER_UR_PROJECTION_Y_PRODUCT"])
-            self.xBL = arcsiUtils.str2Float(headerParams["CORNER_LL_PROJECTION_X_PRODUCT"])
-            self.yBL = arcsiUtils.str2Float(headerParams["CORNER_LL_PROJECTION_Y_PRODUCT"])
-            self.xBR = arcsiUtils.str2Float(headerParams["CORNER_LR_PROJECTION_X_PRODUCT"])
-            self.yBR = arcsiUtils.str2Float(headerParams["CORNER_LR_PROJECTION_Y_PRODUCT"])
+            # Get the geographic lat/long and projected X/Y corners of the image.
+            cornerVals = map(arcsiUtils.str2Float, LS2MSS_CORNER_KEYS(headerParams))
+            (self.latTL, self.lonTL, self.latTR, self.lonTR, self.latBL, self.lonBL, self.latBR, self.lonBR,
+             self.xTL, self.yTL, self.xTR, self.yTR, self.xBL, self.yBL, self.xBR, self.yBR) = cornerVals
 
             # Get projection
-            inProj = osr.SpatialReference()
             if (headerParams["MAP_PROJECTION"] == "UTM") and (headerParams["DATUM"] == "WGS84") and (headerParams["ELLIPSOID"] == "WGS84"):
                 utmZone = int(headerParams["UTM_ZONE"])
-                utmCode = "WGS84UTM" + str(utmZone) + str("N")
-                #print("UTM: ", utmCode)
-                inProj.ImportFromEPSG(self.epsgCodes[utmCode])
+                inProj, latLongTrans = self.getUTMProjTransform(utmZone)
             elif (headerParams["MAP_PROJECTION"] == "PS") and (headerParams["DATUM"] == "WGS84") and (headerParams["ELLIPSOID"] == "WGS84"):
-                inProj.ImportFromWkt("PROJCS[\"PS WGS84\", GEOGCS[\"WGS 84\",DATUM[\"WGS_1984\",SPHEROID[\"WGS 84\",6378137,298.257223563, AUTHORITY[\"EPSG\",\"7030\"]],AUTHORITY[\"EPSG\",\"6326\"]],PRIMEM[\"Greenwich\",0],UNIT[\"degree\",0.0174532925199433],AUTHORITY[\"EPSG\",\"4326\"]],PROJECTION[\"Polar_Stereographic\"],PARAMETER[\"latitude_of_origin\",-71],PARAMETER[\"central_meridian\",0],PARAMETER[\"scale_factor\",1],PARAMETER[\"false_easting\",0],PARAMETER[\"false_northing\",0],UNIT[\"metre\",1,AUTHORITY[\"EPSG\",\"9001\"]]]")
+                inProj, latLongTrans = self.getPSProjTransform()
             else:
                 raise ARCSIException("Expecting Landsat to be projected in UTM or PolarStereographic (PS) with datum=WGS84 and ellipsoid=WGS84.")
 
-            if self.inWKT is "":
+            if not self.inWKT:
                 self.inWKT = inProj.ExportToWkt()
 
-            # Check image is square!
-            if not ((self.xTL == self.xBL) and (self.yTL == self.yTR) and (self.xTR == self.xBR) and (self.yBL == self.yBR)):
-                raise ARCSIException("Image is not square in projected coordinates.")
-
-            self.xCentre = self.xTL + ((self.xTR - self.xTL)/2)
-            self.yCentre = self.yBR + ((self.yTL - self.yBR)/2)
-
-            self.lonCentre, self.latCentre = arcsiUtils.getLongLat(inProj, self.xCentre, self.yCentre)
+            self.setProjCentreLatLong(latLongTrans)
 
             #print("Lat: " + str(self.latCentre) + " Long: " + str(self.lonCentre))
 
@@ -346,11 +333,10 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
         print("Converting to Radiance")
         outputImage = os.path.join(outputPath, outputReflName)
         bandDefnSeq = list()
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band4File, bandIndex=1, lMin=self.b4MinRad, lMax=self.b4MaxRad, qCalMin=self.b4CalMin, qCalMax=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band5File, bandIndex=1, lMin=self.b5MinRad, lMax=self.b5MaxRad, qCalMin=self.b5CalMin, qCalMax=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR1", fileName=self.band6File, bandIndex=1, lMin=self.b6MinRad, lMax=self.b6MaxRad, qCalMin=self.b6CalMin, qCalMax=self.b6CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR2", fileName=self.band7File, bandIndex=1, lMin=self.b7MinRad, lMax=self.b7MaxRad, qCalMin=self.b7CalMin, qCalMax=self.b7CalMax))
+        bandDefnSeq.append(LSBandRad(bandName="Green", fileName=self.band4File, bandIndex=1, lMin=self.b4MinRad, lMax=self.b4MaxRad, qCalMin=self.b4CalMin, qCalMax=self.b4CalMax))
+        bandDefnSeq.append(LSBandRad(bandName="Red", fileName=self.band5File, bandIndex=1, lMin=self.b5MinRad, lMax=self.b5MaxRad, qCalMin=self.b5CalMin, qCalMax=self.b5CalMax))
+        bandDefnSeq.append(LSBandRad(bandName="NIR1", fileName=self.band6File, bandIndex=1, lMin=self.b6MinRad, lMax=self.b6MaxRad, qCalMin=self.b6CalMin, qCalMax=self.b6CalMax))
+        bandDefnSeq.append(LSBandRad(bandName="NIR2", fileName=self.band7File, bandIndex=1, lMin=self.b7MinRad, lMax=self.b7MaxRad, qCalMin=self.b7CalMin, qCalMax=self.b7CalMax))
         rsgislib.imagecalibration.landsat2Radiance(outputImage, outFormat, bandDefnSeq)
         return outputImage, None
 
@@ -358,12 +344,11 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
         print("Generate Saturation Image")
         outputImage = os.path.join(outputPath, outputName)
 
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
         bandDefnSeq = list()
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band4File, bandIndex=1, satVal=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band5File, bandIndex=1, satVal=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR1", fileName=self.band6File, bandIndex=1, satVal=self.b6CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR2", fileName=self.band7File, bandIndex=1, satVal=self.b7CalMax))
+        bandDefnSeq.append(LSBandSat(bandName="Green", fileName=self.band4File, bandIndex=1, satVal=self.b4CalMax))
+        bandDefnSeq.append(LSBandSat(bandName="Red", fileName=self.band5File, bandIndex=1, satVal=self.b5CalMax))
+        bandDefnSeq.append(LSBandSat(bandName="NIR1", fileName=self.band6File, bandIndex=1, satVal=self.b6CalMax))
+        bandDefnSeq.append(LSBandSat(bandName="NIR2", fileName=self.band7File, bandIndex=1, satVal=self.b7CalMax))
 
         rsgislib.imagecalibration.saturatedPixelsMask(outputImage, outFormat, bandDefnSeq)
 
@@ -375,13 +360,7 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
     def convertImageToTOARefl(self, inputRadImage, outputPath, outputName, outFormat, scaleFactor):
         print("Converting to TOA")
         outputImage = os.path.join(outputPath, outputName)
-        solarIrradianceVals = list()
-        IrrVal = collections.namedtuple('SolarIrradiance', ['irradiance'])
-        solarIrradianceVals.append(IrrVal(irradiance=1829.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1539.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1268.0))
-        solarIrradianceVals.append(IrrVal(irradiance=886.6))
-        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, solarIrradianceVals)
+        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, list(LS2MSS_SOLAR_IRRADIANCE))
         return outputImage
 
     def generateCloudMask(self, inputReflImage, inputSatImage, inputThermalImage, inputViewAngleImg, inputValidImg, outputPath, outputName, outFormat, tmpPath, scaleFactor, cloud_msk_methods=None):
@@ -413,7 +392,13 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
         return 4
 
     def calc6SCoefficients(self, aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal, useBRDF):
+        # Import the py6s module for running 6S from python.
+        import Py6S
         sixsCoeffs = numpy.zeros((4, 6), dtype=numpy.float32)
+        # Acquisition date/time for the 6S geometry, shared by all the band runs.
+        acqMonth = self.acquisitionTime.month
+        acqDay = self.acquisitionTime.day
+        gmtDecimalHour = self.acquisitionTime.hour + (self.acquisitionTime.minute / 60.0)
         # Set up 6S model
         s = Py6S.SixS()
         s.atmos_profile = atmosProfile
@@ -421,9 +406,9 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
         #s.ground_reflectance = Py6S.GroundReflectance.HomogeneousHapke(0.101, -0.263, 0.589, 0.046)
         s.ground_reflectance = grdRefl
         s.geometry = Py6S.Geometry.Landsat_TM()
-        s.geometry.month = self.acquisitionTime.month
-        s.geometry.day = self.acquisitionTime.day
-        s.geometry.gmt_decimal_hour = float(self.acquisitionTime.hour) + float(self.acquisitionTime.minute)/60.0
+        s.geometry.month = acqMonth
+        s.geometry.day = acqDay
+        s.geometry.gmt_decimal_hour = gmtDecimalHour
         s.geometry.latitude = self.latCentre
         s.geometry.longitude = self.lonCentre
         s.altitudes = Py6S.Altitudes()
@@ -435,45 +420,17 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
             s.atmos_corr = Py6S.AtmosCorr.AtmosCorrLambertianFromRadiance(200)
         s.aot550 = aotVal
 
-        # Band 1
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B1)
-        s.run()
-        sixsCoeffs[0,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[0,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[0,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[0,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[0,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[0,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 2
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B2)
-        s.run()
-        sixsCoeffs[1,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[1,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[1,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[1,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[1,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[1,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 3
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B3)
-        s.run()
-        sixsCoeffs[2,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[2,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[2,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[2,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[2,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[2,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 4
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B4)
-        s.run()
-        sixsCoeffs[3,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[3,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[3,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[3,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[3,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[3,5] = float(s.outputs.values['environmental_irradiance'])
+        # Run 6S for all four bands as a single batch. Each band is an
+        # independent 6S process so they are run concurrently.
+        wavelengths = [Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B1, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B2, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B3, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_MSS_B4]
+        wvlens, bandOutputs = Py6S.SixSHelpers.Wavelengths.run_wavelengths(s, wavelengths, n=len(wavelengths))
+        for i, bandOutput in enumerate(bandOutputs):
+            sixsCoeffs[i,0] = float(bandOutput.values['coef_xa'])
+            sixsCoeffs[i,1] = float(bandOutput.values['coef_xb'])
+            sixsCoeffs[i,2] = float(bandOutput.values['coef_xc'])
+            sixsCoeffs[i,3] = float(bandOutput.values['direct_solar_irradiance'])
+            sixsCoeffs[i,4] = float(bandOutput.values['diffuse_solar_irradiance'])
+            sixsCoeffs[i,5] = float(bandOutput.values['environmental_irradiance'])
 
         return sixsCoeffs
 
@@ -548,6 +505,8 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
 
     def run6SToOptimiseAODValue(self, aotVal, radBlueVal, predBlueVal, aeroProfile, atmosProfile, grdRefl, surfaceAltitude):
         """Used as part of the optimastion for identifying values of AOD"""
+        # Import the py6s module for running 6S from python.
+        import Py6S
         print("Testing AOD Val: ", aotVal,)
         s = Py6S.SixS()
 
@@ -580,12 +539,10 @@ class ARCSILandsat2MSSSensor (ARCSIAbstractSensor):
         return outDist
 
     def findDDVTargets(self, inputTOAImage, outputPath, outputName, outFormat, tmpPath):
-        print("Not implemented\n")
-        sys.exit()
+        raise ARCSIException("Finding DDV targets is not implemented for LS2 MSS.")
 
     def estimateImageToAODUsingDDV(self, inputTOAImage, outputPath, outputName, outFormat, tmpPath, aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotValMin, aotValMax):
-        print("Not implemented\n")
-        sys.exit()
+        raise ARCSIException("Estimating AOD using DDV is not implemented for LS2 MSS.")
 
     def estimateImageToAODUsingDOS(self, inputRADImage, inputTOAImage, inputDEMFile, shadowMask, outputPath, outputName, outFormat, tmpPath, aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax, globalDOS, simpleDOS, dosOutRefl):
         try:
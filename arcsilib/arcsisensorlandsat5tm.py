@@ -46,13 +46,14 @@ from .arcsisensor import ARCSIAbstractSensor
 from .arcsiexception import ARCSIException
 # Import the ARCSI utilities class
 from .arcsiutils import ARCSIUtils
+# Import the ARCSI per band array property helper
+from .arcsiutils import bandRangeProperty
 # Import the ARCSI landsat utilities class
 from .arcsiutils import ARCSILandsatMetaUtils
 # Import the datetime module
 import datetime
 # Import the GDAL/OGR spatial reference library
 from osgeo import osr
-from osgeo import ogr
 # Import OS path module for manipulating the file system
 import os.path
 # Import the sys module
@@ -87,14 +88,74 @@ import fmask.config
 import fmask.fmask
 import rios.fileinfo
 
+# Per band MTL keys for the calibration and radiance ranges: (min, max, pre-collection min, pre-collection max).
+LS5TM_QCAL_KEYS = tuple(("QUANTIZE_CAL_MIN_BAND_{}".format(i), "QUANTIZE_CAL_MAX_BAND_{}".format(i), "QCALMIN_BAND{}".format(i), "QCALMAX_BAND{}".format(i)) for i in range(1,8))
+LS5TM_RAD_KEYS = tuple(("RADIANCE_MINIMUM_BAND_{}".format(i), "RADIANCE_MAXIMUM_BAND_{}".format(i), "LMIN_BAND{}".format(i), "LMAX_BAND{}".format(i)) for i in range(1,8))
+
+# Band definition types passed to the RSGISLib calibration functions.
+LSBandRad = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
+LSBandSat = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
+LSBandThermal = collections.namedtuple('LSBand', ['bandName', 'bandIndex', 'k1', 'k2'])
+SolarIrradiance = collections.namedtuple('SolarIrradiance', ['irradiance'])
+
+# Solar irradiance for the six Landsat 5 TM reflective bands.
+LS5TM_SOLAR_IRRADIANCE = (SolarIrradiance(irradiance=1957.0), SolarIrradiance(irradiance=1826.0), SolarIrradiance(irradiance=1554.0),
+                          SolarIrradiance(irradiance=1036.0), SolarIrradiance(irradiance=215.0), SolarIrradiance(irradiance=80.67))
+
+# Thermal band (6) brightness temperature constants.
+LS5TM_THERMAL_BAND = LSBandThermal(bandName="ThermalB6", bandIndex=1, k1=607.76, k2=1260.56)
+
+# Names of the reflective bands and their index within the per band (1-7) arrays, in output band order.
+LS5TM_REFL_BANDS = (("Blue", 0), ("Green", 1), ("Red", 2), ("NIR", 3), ("SWIR1", 4), ("SWIR2", 6))
+
+# 6S wavelengths of the reflective bands, in output band order (1-5 and 7).
+LS5TM_6S_WAVELENGTHS = (Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B1, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B2,
+                        Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B3, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B4,
+                        Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B5, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B7)
+
+# 6S wavelength of the blue band used for the AOD estimation, created once and shared.
+LS5TM_BLUE_6S_WAVELENGTH = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B1)
+
 class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
     """
     A class which represents the landsat 5 TM sensor to read
     header parameters and apply data processing operations.
     """
+    # Read-only aliases of the previous per band attribute names onto the per band range arrays.
+    b1CalMin = bandRangeProperty('calMin', 0)
+    b1CalMax = bandRangeProperty('calMax', 0)
+    b1MinRad = bandRangeProperty('radMin', 0)
+    b1MaxRad = bandRangeProperty('radMax', 0)
+    b2CalMin = bandRangeProperty('calMin', 1)
+    b2CalMax = bandRangeProperty('calMax', 1)
+    b2MinRad = bandRangeProperty('radMin', 1)
+    b2MaxRad = bandRangeProperty('radMax', 1)
+    b3CalMin = bandRangeProperty('calMin', 2)
+    b3CalMax = bandRangeProperty('calMax', 2)
+    b3MinRad = bandRangeProperty('radMin', 2)
+    b3MaxRad = bandRangeProperty('radMax', 2)
+    b4CalMin = bandRangeProperty('calMin', 3)
+    b4CalMax = bandRangeProperty('calMax', 3)
+    b4MinRad = bandRangeProperty('radMin', 3)
+    b4MaxRad = bandRangeProperty('radMax', 3)
+    b5CalMin = bandRangeProperty('calMin', 4)
+    b5CalMax = bandRangeProperty('calMax', 4)
+    b5MinRad = bandRangeProperty('radMin', 4)
+    b5MaxRad = bandRangeProperty('radMax', 4)
+    b6CalMin = bandRangeProperty('calMin', 5)
+    b6CalMax = bandRangeProperty('calMax', 5)
+    b6MinRad = bandRangeProperty('radMin', 5)
+    b6MaxRad = bandRangeProperty('radMax', 5)
+    b7CalMin = bandRangeProperty('calMin', 6)
+    b7CalMax = bandRangeProperty('calMax', 6)
+    b7MinRad = bandRangeProperty('radMin', 6)
+    b7MaxRad = bandRangeProperty('radMax', 6)
+
     def __init__(self, debugMode, inputImage):
         ARCSIAbstractSensor.__init__(self, debugMode, inputImage)
         self.sensor = "LS5TM"
+        # calc6SCoefficients runs 6S for all the bands at once.
+        self.num6SBandProcs = len(LS5TM_6S_WAVELENGTHS)
         self.band1File = ""
         self.band2File = ""
         self.band3File = ""
@@ -106,35 +167,11 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         self.row = 0
         self.path = 0
 
-        self.b1CalMin = 0
-        self.b1CalMax = 0
-        self.b2CalMin = 0
-        self.b2CalMax = 0
-        self.b3CalMin = 0
-        self.b3CalMax = 0
-        self.b4CalMin = 0
-        self.b4CalMax = 0
-        self.b5CalMin = 0
-        self.b5CalMax = 0
-        self.b6CalMin = 0
-        self.b6CalMax = 0
-        self.b7CalMin = 0
-        self.b7CalMax = 0
-
-        self.b1MinRad = 0.0
-        self.b1MaxRad = 0.0
-        self.b2MinRad = 0.0
-        self.b2MaxRad = 0.0
-        self.b3MinRad = 0.0
-        self.b3MaxRad = 0.0
-        self.b4MinRad = 0.0
-        self.b4MaxRad = 0.0
-        self.b5MinRad = 0.0
-        self.b5MaxRad = 0.0
-        self.b6MinRad = 0.0
-        self.b6MaxRad = 0.0
-        self.b7MinRad = 0.0
-        self.b7MaxRad = 0.0
+        # Per band (1-7) calibration and radiance ranges from the header.
+        self.calMin = numpy.zeros(7)
+        self.calMax = numpy.zeros(7)
+        self.radMin = numpy.zeros(7)
+        self.radMax = numpy.zeros(7)
 
         self.sensorID = ""
         self.spacecraftID = ""
@@ -144,6 +181,15 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         self.gridCellSizeRefl = 0.0
         self.gridCellSizeTherm = 0.0
 
+        # Blue band 6S model reused by run6SToOptimiseAODValue.
+        self.aodSixS = None
+        self.aodSixSParams = None
+
+    @property
+    def _bandFiles(self):
+        """The band files 1-7 in band order, read from the bandNFile attributes."""
+        return (self.band1File, self.band2File, self.band3File, self.band4File, self.band5File, self.band6File, self.band7File)
+
     def extractHeaderParameters(self, inputHeader, wktStr):
         """
         Understands and parses the Landsat MTL header files
@@ -153,19 +199,12 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
                 raise ARCSIException("Landsat sensor cannot accept a user specified image file - only the images in the header file will be used.")
             self.headerFileName = os.path.split(inputHeader)[1]
             
-            arcsiUtils = ARCSIUtils()
 
             print("Reading header file")
-            hFile = open(inputHeader, 'r')
-            headerParams = dict()
-            for line in hFile:
-                line = line.strip()
-                if line:
-                    lineVals = line.split('=')
-                    if len(lineVals) == 2:
-                        if (lineVals[0].strip() != "GROUP") or (lineVals[0].strip() != "END_GROUP"):
-                            headerParams[lineVals[0].strip()] = lineVals[1].strip().replace('"','')
-            hFile.close()
+            with open(inputHeader, 'r') as hFile:
+                headerLines = hFile.read().split('\n')
+            lineVals = [line.partition('=') for line in headerLines]
+            headerParams = {key.strip(): val.strip().replace('"','') for key, sep, val in lineVals if sep}
             print("Extracting Header Values")
             # Get the sensor info.
             if ((headerParams["SPACECRAFT_ID"].upper() == "LANDSAT_5") or (headerParams["SPACECRAFT_ID"].upper() == "LANDSAT5")) and (headerParams["SENSOR_ID"].upper() == "TM"):
@@ -184,47 +223,30 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             self.path = int(headerParams["WRS_PATH"])
 
             # Get date and time of the acquisition
-            try:
+            if "DATE_ACQUIRED" in headerParams:
                 acData = headerParams["DATE_ACQUIRED"].split('-')
-            except KeyError:
+            else:
                 acData = headerParams["ACQUISITION_DATE"].split('-')
-            try:
+            if "SCENE_CENTER_TIME" in headerParams:
                 acTime = headerParams["SCENE_CENTER_TIME"].split(':')
-            except KeyError:
+            else:
                 acTime = headerParams["SCENE_CENTER_SCAN_TIME"].split(':')
 
             secsTime = acTime[2].split('.')
             self.acquisitionTime = datetime.datetime(int(acData[0]), int(acData[1]), int(acData[2]), int(acTime[0]), int(acTime[1]), int(secsTime[0]))
 
-            self.solarZenith = 90-arcsiUtils.str2Float(headerParams["SUN_ELEVATION"])
-            self.solarAzimuth = arcsiUtils.str2Float(headerParams["SUN_AZIMUTH"])
+            self.solarZenith = 90-ARCSIUtils.str2Float(headerParams["SUN_ELEVATION"])
+            self.solarAzimuth = ARCSIUtils.str2Float(headerParams["SUN_AZIMUTH"])
 
             # Get the geographic lat/long corners of the image.
             geoCorners = ARCSILandsatMetaUtils.getGeographicCorners(headerParams)
-
-            self.latTL = geoCorners[0]
-            self.lonTL = geoCorners[1]
-            self.latTR = geoCorners[2]
-            self.lonTR = geoCorners[3]
-            self.latBL = geoCorners[4]
-            self.lonBL = geoCorners[5]
-            self.latBR = geoCorners[6]
-            self.lonBR = geoCorners[7]
+            self.latTL, self.lonTL, self.latTR, self.lonTR, self.latBL, self.lonBL, self.latBR, self.lonBR = geoCorners
 
             # Get the projected X/Y corners of the image
             projectedCorners = ARCSILandsatMetaUtils.getProjectedCorners(headerParams)
-
-            self.xTL = projectedCorners[0]
-            self.yTL = projectedCorners[1]
-            self.xTR = projectedCorners[2]
-            self.yTR = projectedCorners[3]
-            self.xBL = projectedCorners[4]
-            self.yBL = projectedCorners[5]
-            self.xBR = projectedCorners[6]
-            self.yBR = projectedCorners[7]
+            self.xTL, self.yTL, self.xTR, self.yTR, self.xBL, self.yBL, self.xBR, self.yBR = projectedCorners
 
             # Get projection
-            inProj = osr.SpatialReference()
             if (headerParams["MAP_PROJECTION"] == "UTM"):
                 try:
                     datum = headerParams["DATUM"]
@@ -242,25 +264,16 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
                     utmZone = int(headerParams["UTM_ZONE"])
                 except KeyError:
                     utmZone = int(headerParams["ZONE_NUMBER"])
-                # FIXME: should this be hardcoded to north?
-                utmCode = "WGS84UTM" + str(utmZone) + str("N")
-                inProj.ImportFromEPSG(self.epsgCodes[utmCode])
+                inProj, latLongTrans = self.getUTMProjTransform(utmZone)
             elif (headerParams["MAP_PROJECTION"] == "PS") and (headerParams["DATUM"] == "WGS84") and (headerParams["ELLIPSOID"] == "WGS84"):
-                inProj.ImportFromWkt("PROJCS[\"PS WGS84\", GEOGCS[\"WGS 84\",DATUM[\"WGS_1984\",SPHEROID[\"WGS 84\",6378137,298.257223563, AUTHORITY[\"EPSG\",\"7030\"]],AUTHORITY[\"EPSG\",\"6326\"]],PRIMEM[\"Greenwich\",0],UNIT[\"degree\",0.0174532925199433],AUTHORITY[\"EPSG\",\"4326\"]],PROJECTION[\"Polar_Stereographic\"],PARAMETER[\"latitude_of_origin\",-71],PARAMETER[\"central_meridian\",0],PARAMETER[\"scale_factor\",1],PARAMETER[\"false_easting\",0],PARAMETER[\"false_northing\",0],UNIT[\"metre\",1,AUTHORITY[\"EPSG\",\"9001\"]]]")
+                inProj, latLongTrans = self.getPSProjTransform()
             else:
                 raise ARCSIException("Expecting Landsat to be projected in UTM or PolarStereographic (PS) with datum=WGS84 and ellipsoid=WGS84.")
 
-            if self.inWKT is "":
+            if not self.inWKT:
                 self.inWKT = inProj.ExportToWkt()
 
-            # Check image is square!
-            if not ((self.xTL == self.xBL) and (self.yTL == self.yTR) and (self.xTR == self.xBR) and (self.yBL == self.yBR)):
-                raise ARCSIException("Image is not square in projected coordinates.")
-
-            self.xCentre = self.xTL + ((self.xTR - self.xTL)/2)
-            self.yCentre = self.yBR + ((self.yTL - self.yBR)/2)
-
-            self.lonCentre, self.latCentre = arcsiUtils.getLongLat(inProj, self.xCentre, self.yCentre)
+            self.setProjCentreLatLong(latLongTrans)
 
             #print("Lat: " + str(self.latCentre) + " Long: " + str(self.lonCentre))
 
@@ -268,13 +281,7 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
 
             filesDIR = os.path.dirname(inputHeader)
 
-            self.band1File = os.path.join(filesDIR, metaFilenames[0])
-            self.band2File = os.path.join(filesDIR, metaFilenames[1])
-            self.band3File = os.path.join(filesDIR, metaFilenames[2])
-            self.band4File = os.path.join(filesDIR, metaFilenames[3])
-            self.band5File = os.path.join(filesDIR, metaFilenames[4])
-            self.band6File = os.path.join(filesDIR, metaFilenames[5])
-            self.band7File = os.path.join(filesDIR, metaFilenames[6])
+            self.band1File, self.band2File, self.band3File, self.band4File, self.band5File, self.band6File, self.band7File = [os.path.join(filesDIR, metaFilename) for metaFilename in metaFilenames]
 
             try:
                 self.bandQAFile = os.path.join(filesDIR, headerParams["FILE_NAME_BAND_QUALITY"])
@@ -282,69 +289,29 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
                 print("Warning - the quality band is not available. Are you using collection 1 data?")
                 self.bandQAFile = ""
 
-            metaQCalMinList = []
-            metaQCalMaxList = []
-
-            for i in range(1,8):
-                try:
-                    metaQCalMinList.append(arcsiUtils.str2Float(headerParams["QUANTIZE_CAL_MIN_BAND_{}".format(i)], 1.0))
-                    metaQCalMaxList.append(arcsiUtils.str2Float(headerParams["QUANTIZE_CAL_MAX_BAND_{}".format(i)], 255.0))
-                except KeyError:
-                    metaQCalMinList.append(arcsiUtils.str2Float(headerParams["QCALMIN_BAND{}".format(i)], 1.0))
-                    metaQCalMaxList.append(arcsiUtils.str2Float(headerParams["QCALMAX_BAND{}".format(i)], 255.0))
-
-            self.b1CalMin = metaQCalMinList[0]
-            self.b1CalMax = metaQCalMaxList[0]
-            self.b2CalMin = metaQCalMinList[1]
-            self.b2CalMax = metaQCalMaxList[1]
-            self.b3CalMin = metaQCalMinList[2]
-            self.b3CalMax = metaQCalMaxList[2]
-            self.b4CalMin = metaQCalMinList[3]
-            self.b4CalMax = metaQCalMaxList[3]
-            self.b5CalMin = metaQCalMinList[4]
-            self.b5CalMax = metaQCalMaxList[4]
-            self.b6CalMin = metaQCalMinList[5]
-            self.b6CalMax = metaQCalMaxList[5]
-            self.b7CalMin = metaQCalMinList[6]
-            self.b7CalMax = metaQCalMaxList[6]
+            # Select the key naming scheme once, the header uses one or the other throughout.
+            keysStart = 0 if LS5TM_QCAL_KEYS[0][0] in headerParams else 2
+            minKeys, maxKeys = zip(*[bandKeys[keysStart:keysStart+2] for bandKeys in LS5TM_QCAL_KEYS])
+            self.calMin = numpy.fromiter((ARCSIUtils.str2Float(headerParams[key], 1.0) for key in minKeys), dtype=numpy.float64, count=7)
+            self.calMax = numpy.fromiter((ARCSIUtils.str2Float(headerParams[key], 255.0) for key in maxKeys), dtype=numpy.float64, count=7)
 
             lMin = [-1.520, -2.840, -1.170, -1.510, -0.370, 1.238, -0.150]
             lMax = [193.000, 365.000, 264.000, 221.000, 30.200, 15.303, 16.500]
-            metaRadMinList = []
-            metaRadMaxList = []
-            for i in range(1,8):
-                try:
-                    metaRadMinList.append(arcsiUtils.str2Float(headerParams["RADIANCE_MINIMUM_BAND_{}".format(i)], lMin[i-1]))
-                    metaRadMaxList.append(arcsiUtils.str2Float(headerParams["RADIANCE_MAXIMUM_BAND_{}".format(i)], lMax[i-1]))
-                except KeyError:
-                    metaRadMinList.append(arcsiUtils.str2Float(headerParams["LMIN_BAND{}".format(i)], lMin[i-1]))
-                    metaRadMaxList.append(arcsiUtils.str2Float(headerParams["LMAX_BAND{}".format(i)], lMax[i-1]))
-
-            self.b1MinRad = metaRadMinList[0]
-            self.b1MaxRad = metaRadMaxList[0]
-            self.b2MinRad = metaRadMinList[1]
-            self.b2MaxRad = metaRadMaxList[1]
-            self.b3MinRad = metaRadMinList[2]
-            self.b3MaxRad = metaRadMaxList[2]
-            self.b4MinRad = metaRadMinList[3]
-            self.b4MaxRad = metaRadMaxList[3]
-            self.b5MinRad = metaRadMinList[4]
-            self.b5MaxRad = metaRadMaxList[4]
-            self.b6MinRad = metaRadMinList[5]
-            self.b6MaxRad = metaRadMaxList[5]
-            self.b7MinRad = metaRadMinList[6]
-            self.b7MaxRad = metaRadMaxList[6]
+            keysStart = 0 if LS5TM_RAD_KEYS[0][0] in headerParams else 2
+            minKeys, maxKeys = zip(*[bandKeys[keysStart:keysStart+2] for bandKeys in LS5TM_RAD_KEYS])
+            self.radMin = numpy.fromiter((ARCSIUtils.str2Float(headerParams[key], errVal) for key, errVal in zip(minKeys, lMin)), dtype=numpy.float64, count=7)
+            self.radMax = numpy.fromiter((ARCSIUtils.str2Float(headerParams[key], errVal) for key, errVal in zip(maxKeys, lMax)), dtype=numpy.float64, count=7)
 
             if "CLOUD_COVER" in headerParams:
-                self.cloudCover = arcsiUtils.str2Float(headerParams["CLOUD_COVER"], 0.0)
+                self.cloudCover = ARCSIUtils.str2Float(headerParams["CLOUD_COVER"], 0.0)
             if "CLOUD_COVER_LAND" in headerParams:
-                self.cloudCoverLand = arcsiUtils.str2Float(headerParams["CLOUD_COVER_LAND"], 0.0)
+                self.cloudCoverLand = ARCSIUtils.str2Float(headerParams["CLOUD_COVER_LAND"], 0.0)
             if "EARTH_SUN_DISTANCE" in headerParams:
-                self.earthSunDistance = arcsiUtils.str2Float(headerParams["EARTH_SUN_DISTANCE"], 0.0)
+                self.earthSunDistance = ARCSIUtils.str2Float(headerParams["EARTH_SUN_DISTANCE"], 0.0)
             if "GRID_CELL_SIZE_REFLECTIVE" in headerParams:
-                self.gridCellSizeRefl = arcsiUtils.str2Float(headerParams["GRID_CELL_SIZE_REFLECTIVE"], 60.0)
+                self.gridCellSizeRefl = ARCSIUtils.str2Float(headerParams["GRID_CELL_SIZE_REFLECTIVE"], 60.0)
             if "GRID_CELL_SIZE_THERMAL" in headerParams:
-                self.gridCellSizeTherm = arcsiUtils.str2Float(headerParams["GRID_CELL_SIZE_THERMAL"], 30.0)
+                self.gridCellSizeTherm = ARCSIUtils.str2Float(headerParams["GRID_CELL_SIZE_THERMAL"], 30.0)
 
             fileDateStr = headerParams["FILE_DATE"].strip()
             fileDateStr = fileDateStr.replace('Z', '')
@@ -404,24 +371,16 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             json.dump(jsonData, outfile, sort_keys=True,indent=4, separators=(',', ': '), ensure_ascii=False)
 
     def expectedImageDataPresent(self):
-        imageDataPresent = True
-
-        if not os.path.exists(self.band1File):
-            imageDataPresent = False
-        if not os.path.exists(self.band2File):
-            imageDataPresent = False
-        if not os.path.exists(self.band3File):
-            imageDataPresent = False
-        if not os.path.exists(self.band4File):
-            imageDataPresent = False
-        if not os.path.exists(self.band5File):
-            imageDataPresent = False
-        if not os.path.exists(self.band6File):
-            imageDataPresent = False
-        if not os.path.exists(self.band7File):
-            imageDataPresent = False
-
-        return imageDataPresent
+        bandDIRs = set(os.path.dirname(bandFile) for bandFile in self._bandFiles)
+        if len(bandDIRs) == 1:
+            # The bands are all next to the header, so list the directory
+            # once rather than stat each file (slow on network file systems).
+            bandDIR = bandDIRs.pop() or os.curdir
+            if not os.path.isdir(bandDIR):
+                return False
+            dirFiles = set(entry.name for entry in os.scandir(bandDIR))
+            return all(os.path.basename(bandFile) in dirFiles for bandFile in self._bandFiles)
+        return all(os.path.exists(bandFile) for bandFile in self._bandFiles)
 
     def hasThermal(self):
         return True
@@ -443,7 +402,8 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         tmpBaseName = os.path.splitext(outputMaskName)[0]
         tmpValidPxlMsk = os.path.join(outputPath, tmpBaseName+'vldpxlmsk.kea')
         outputImage = os.path.join(outputPath, outputMaskName)
-        inImages = [self.band1File, self.band2File, self.band3File, self.band4File, self.band5File, self.band7File, self.band6File]
+        # Reflective bands then the thermal band (6).
+        inImages = list(self._bandFiles[:5]) + [self._bandFiles[6], self._bandFiles[5]]
         rsgislib.imageutils.genValidMask(inimages=inImages, outimage=tmpValidPxlMsk, gdalformat='KEA', nodata=0.0)
         rsgislib.rastergis.populateStats(tmpValidPxlMsk, True, False, True)
         # Check there is valid data
@@ -476,22 +436,12 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         print("Converting to Radiance")
         outputReflImage = os.path.join(outputPath, outputReflName)
         outputThermalImage = None
-        bandDefnSeq = list()
-
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
-        bandDefnSeq.append(lsBand(bandName="Blue", fileName=self.band1File, bandIndex=1, lMin=self.b1MinRad, lMax=self.b1MaxRad, qCalMin=self.b1CalMin, qCalMax=self.b1CalMax))
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band2File, bandIndex=1, lMin=self.b2MinRad, lMax=self.b2MaxRad, qCalMin=self.b2CalMin, qCalMax=self.b2CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band3File, bandIndex=1, lMin=self.b3MinRad, lMax=self.b3MaxRad, qCalMin=self.b3CalMin, qCalMax=self.b3CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR", fileName=self.band4File, bandIndex=1, lMin=self.b4MinRad, lMax=self.b4MaxRad, qCalMin=self.b4CalMin, qCalMax=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR1", fileName=self.band5File, bandIndex=1, lMin=self.b5MinRad, lMax=self.b5MaxRad, qCalMin=self.b5CalMin, qCalMax=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR2", fileName=self.band7File, bandIndex=1, lMin=self.b7MinRad, lMax=self.b7MaxRad, qCalMin=self.b7CalMin, qCalMax=self.b7CalMax))
+        bandDefnSeq = [LSBandRad(bandName=bandName, fileName=self._bandFiles[i], bandIndex=1, lMin=self.radMin[i], lMax=self.radMax[i], qCalMin=self.calMin[i], qCalMax=self.calMax[i]) for bandName, i in LS5TM_REFL_BANDS]
         rsgislib.imagecalibration.landsat2Radiance(outputReflImage, outFormat, bandDefnSeq)
 
-        if not outputThermalName == None:
+        if outputThermalName is not None:
             outputThermalImage = os.path.join(outputPath, outputThermalName)
-            bandDefnSeq = list()
-            lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
-            bandDefnSeq.append(lsBand(bandName="ThermalB6", fileName=self.band6File, bandIndex=1, lMin=self.b6MinRad, lMax=self.b6MaxRad, qCalMin=self.b6CalMin, qCalMax=self.b6CalMax))
+            bandDefnSeq = [LSBandRad(bandName="ThermalB6", fileName=self.band6File, bandIndex=1, lMin=self.radMin[5], lMax=self.radMax[5], qCalMin=self.calMin[5], qCalMax=self.calMax[5])]
             rsgislib.imagecalibration.landsat2Radiance(outputThermalImage, outFormat, bandDefnSeq)
 
         return outputReflImage, outputThermalImage
@@ -500,15 +450,8 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         print("Generate Saturation Image")
         outputImage = os.path.join(outputPath, outputName)
 
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
-        bandDefnSeq = list()
-        bandDefnSeq.append(lsBand(bandName="Blue", fileName=self.band1File, bandIndex=1, satVal=self.b1CalMax))
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band2File, bandIndex=1, satVal=self.b2CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band3File, bandIndex=1, satVal=self.b3CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR", fileName=self.band4File, bandIndex=1, satVal=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR1", fileName=self.band5File, bandIndex=1, satVal=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR2", fileName=self.band7File, bandIndex=1, satVal=self.b7CalMax))
-        bandDefnSeq.append(lsBand(bandName="ThermalB6", fileName=self.band6File, bandIndex=1, satVal=self.b6CalMax))
+        bandDefnSeq = [LSBandSat(bandName=bandName, fileName=self._bandFiles[i], bandIndex=1, satVal=self.calMax[i]) for bandName, i in LS5TM_REFL_BANDS]
+        bandDefnSeq.append(LSBandSat(bandName="ThermalB6", fileName=self.band6File, bandIndex=1, satVal=self.calMax[5]))
 
         rsgislib.imagecalibration.saturatedPixelsMask(outputImage, outFormat, bandDefnSeq)
 
@@ -517,34 +460,21 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
     def convertThermalToBrightness(self, inputRadImage, outputPath, outputName, outFormat, scaleFactor):
         print("Converting to Thermal Brightness")
         outputThermalImage = os.path.join(outputPath, outputName)
-        bandDefnSeq = list()
-
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'bandIndex', 'k1', 'k2'])
-        bandDefnSeq.append(lsBand(bandName="ThermalB6", bandIndex=1, k1=607.76, k2=1260.56))
-        rsgislib.imagecalibration.landsatThermalRad2Brightness(inputRadImage, outputThermalImage, outFormat, rsgislib.TYPE_32INT, scaleFactor, bandDefnSeq)
+        rsgislib.imagecalibration.landsatThermalRad2Brightness(inputRadImage, outputThermalImage, outFormat, rsgislib.TYPE_32INT, scaleFactor, [LS5TM_THERMAL_BAND])
         return outputThermalImage
 
     def convertImageToTOARefl(self, inputRadImage, outputPath, outputName, outFormat, scaleFactor):
         print("Converting to TOA")
         outputImage = os.path.join(outputPath, outputName)
-        solarIrradianceVals = list()
-        IrrVal = collections.namedtuple('SolarIrradiance', ['irradiance'])
-        solarIrradianceVals.append(IrrVal(irradiance=1957.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1826.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1554.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1036.0))
-        solarIrradianceVals.append(IrrVal(irradiance=215.0))
-        solarIrradianceVals.append(IrrVal(irradiance=80.67))
-        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, solarIrradianceVals)
+        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, list(LS5TM_SOLAR_IRRADIANCE))
         return outputImage
 
     def generateCloudMask(self, inputReflImage, inputSatImage, inputThermalImage, inputViewAngleImg, inputValidImg, outputPath, outputName, outFormat, tmpPath, scaleFactor, cloud_msk_methods=None):
         try:
-            arcsiUtils = ARCSIUtils()
             rsgisUtils = rsgislib.RSGISPyUtils()
             outputImage = os.path.join(outputPath, outputName)
             tmpBaseName = os.path.splitext(outputName)[0]
-            imgExtension = arcsiUtils.getFileExtension(outFormat)
+            imgExtension = ARCSIUtils.getFileExtension(outFormat)
             tmpBaseDIR = os.path.join(tmpPath, tmpBaseName)
 
             tmpDIRExisted = True
@@ -570,10 +500,10 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
                 fmaskFilenames.setSaturationMask(inputSatImage)
                 fmaskFilenames.setOutputCloudMaskFile(tmpFMaskOut)
 
-                thermalGain1040um = (self.b6MaxRad - self.b6MinRad) / (self.b6CalMax - self.b6CalMin)
-                thermalOffset1040um = self.b6MinRad - self.b6CalMin * thermalGain1040um
+                thermalGain1040um = (self.radMax[5] - self.radMin[5]) / (self.calMax[5] - self.calMin[5])
+                thermalOffset1040um = self.radMin[5] - self.calMin[5] * thermalGain1040um
                 thermalBand1040um = 0
-                thermalInfo = fmask.config.ThermalFileInfo(thermalBand1040um, thermalGain1040um, thermalOffset1040um, 607.76, 1260.56)
+                thermalInfo = fmask.config.ThermalFileInfo(thermalBand1040um, thermalGain1040um, thermalOffset1040um, LS5TM_THERMAL_BAND.k1, LS5TM_THERMAL_BAND.k2)
 
                 anglesInfo = fmask.config.AnglesFileInfo(inputViewAngleImg, 3, inputViewAngleImg, 2, inputViewAngleImg, 1, inputViewAngleImg, 0)
 
@@ -683,65 +613,16 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             s.atmos_corr = Py6S.AtmosCorr.AtmosCorrLambertianFromRadiance(200)
         s.aot550 = aotVal
 
-        # Band 1
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B1)
-        s.run()
-        sixsCoeffs[0,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[0,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[0,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[0,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[0,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[0,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 2
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B2)
-        s.run()
-        sixsCoeffs[1,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[1,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[1,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[1,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[1,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[1,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 3
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B3)
-        s.run()
-        sixsCoeffs[2,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[2,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[2,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[2,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[2,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[2,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 4
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B4)
-        s.run()
-        sixsCoeffs[3,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[3,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[3,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[3,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[3,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[3,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 5
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B5)
-        s.run()
-        sixsCoeffs[4,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[4,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[4,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[4,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[4,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[4,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 6
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B7)
-        s.run()
-        sixsCoeffs[5,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[5,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[5,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[5,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[5,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[5,5] = float(s.outputs.values['environmental_irradiance'])
+        # Run 6S for the six reflective bands as a single batch. Each band is
+        # an independent 6S process so they are run concurrently.
+        wvlens, bandOutputs = Py6S.SixSHelpers.Wavelengths.run_wavelengths(s, LS5TM_6S_WAVELENGTHS, n=len(LS5TM_6S_WAVELENGTHS))
+        for i, bandOutput in enumerate(bandOutputs):
+            sixsCoeffs[i,0] = float(bandOutput.values['coef_xa'])
+            sixsCoeffs[i,1] = float(bandOutput.values['coef_xb'])
+            sixsCoeffs[i,2] = float(bandOutput.values['coef_xc'])
+            sixsCoeffs[i,3] = float(bandOutput.values['direct_solar_irradiance'])
+            sixsCoeffs[i,4] = float(bandOutput.values['diffuse_solar_irradiance'])
+            sixsCoeffs[i,5] = float(bandOutput.values['environmental_irradiance'])
 
         return sixsCoeffs
 
@@ -749,16 +630,8 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         print("Converting to Surface Reflectance")
         outputImage = os.path.join(outputPath, outputName)
 
-        imgBandCoeffs = list()
-
         sixsCoeffs = self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal, useBRDF)
-
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
+        imgBandCoeffs = self.get6SBandCoeffs(sixsCoeffs)
 
         rsgislib.imagecalibration.apply6SCoeffSingleParam(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, imgBandCoeffs)
         return outputImage
@@ -772,19 +645,8 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             elev6SCoeffsLUT = self.buildElevation6SCoeffLUT(aeroProfile, atmosProfile, grdRefl, aotVal, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax)
             print("LUT has been built.")
 
-            elevCoeffs = list()
-            for elevLUT in elev6SCoeffsLUT:
-                imgBandCoeffs = list()
-                sixsCoeffs = elevLUT.Coeffs
-                elevVal = elevLUT.Elev
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
-
-                elevCoeffs.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevVal), Coeffs=imgBandCoeffs))
+            coeffsLUTArr = numpy.array([elevLUT.Coeffs for elevLUT in elev6SCoeffsLUT], dtype=numpy.float32)
+            elevCoeffs = [rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevLUT.Elev), Coeffs=self.get6SBandCoeffs(elevCoeffsArr)) for elevLUT, elevCoeffsArr in zip(elev6SCoeffsLUT, coeffsLUTArr)]
 
         rsgislib.imagecalibration.apply6SCoeffElevLUTParam(inputRadImage, inputDEMFile, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, elevCoeffs)
         return outputImage, elevCoeffs
@@ -797,23 +659,10 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             print("Build an LUT for elevation and AOT values.")
             elevAOT6SCoeffsLUT = self.buildElevationAOT6SCoeffLUT(aeroProfile, atmosProfile, grdRefl, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax, aotMin, aotMax)
 
-            elevAOTCoeffs = list()
-            for elevLUT in elevAOT6SCoeffsLUT:
-                elevVal = elevLUT.Elev
-                aotLUT = elevLUT.Coeffs
-                aot6SCoeffsOut = list()
-                for aotFeat in aotLUT:
-                    sixsCoeffs = aotFeat.Coeffs
-                    aotVal = aotFeat.AOT
-                    imgBandCoeffs = list()
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
-                    aot6SCoeffsOut.append(rsgislib.imagecalibration.AOTLUTFeat(AOT=float(aotVal), Coeffs=imgBandCoeffs))
-                elevAOTCoeffs.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevVal), Coeffs=aot6SCoeffsOut))
+            # Gather the coefficients into a single (elevation, AOT, band, coeff) array,
+            # then build the rsgislib LUT features, which the applier requires, from it.
+            coeffsLUTArr = numpy.array([[aotFeat.Coeffs for aotFeat in elevLUT.Coeffs] for elevLUT in elevAOT6SCoeffsLUT], dtype=numpy.float32)
+            elevAOTCoeffs = [rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevLUT.Elev), Coeffs=[rsgislib.imagecalibration.AOTLUTFeat(AOT=float(aotFeat.AOT), Coeffs=self.get6SBandCoeffs(aotCoeffsArr)) for aotFeat, aotCoeffsArr in zip(elevLUT.Coeffs, elevCoeffsArr)]) for elevLUT, elevCoeffsArr in zip(elevAOT6SCoeffsLUT, coeffsLUTArr)]
 
         rsgislib.imagecalibration.apply6SCoeffElevAOTLUTParam(inputRadImage, inputDEMFile, inputAOTImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, elevAOTCoeffs)
 
@@ -823,8 +672,49 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         """Used as part of the optimastion for identifying values of AOD"""
         print("Testing AOD Val: ", aotVal,)
 
-        s = Py6S.SixS()
+        # The 6S model is configured once and reused while the profiles are
+        # unchanged; only the altitude and AOD vary between calls.
+        sixsParams = (aeroProfile, atmosProfile, grdRefl)
+        if (self.aodSixS is None) or (self.aodSixSParams != sixsParams):
+            s = Py6S.SixS()
+            s.atmos_profile = atmosProfile
+            s.aero_profile = aeroProfile
+            s.ground_reflectance = grdRefl
+            s.geometry = Py6S.Geometry.Landsat_TM()
+            s.geometry.month = self.acquisitionTime.month
+            s.geometry.day = self.acquisitionTime.day
+            s.geometry.gmt_decimal_hour = float(self.acquisitionTime.hour) + float(self.acquisitionTime.minute)/60.0
+            s.geometry.latitude = self.latCentre
+            s.geometry.longitude = self.lonCentre
+            s.altitudes = Py6S.Altitudes()
+            s.altitudes.set_sensor_satellite_level()
+            s.atmos_corr = Py6S.AtmosCorr.AtmosCorrLambertianFromRadiance(200)
+            # Band 1 (Blue!)
+            s.wavelength = LS5TM_BLUE_6S_WAVELENGTH
+            self.aodSixS = s
+            self.aodSixSParams = sixsParams
+        s = self.aodSixS
+        s.altitudes.set_target_custom_altitude(surfaceAltitude)
+        s.aot550 = aotVal
+
+        s.run()
+        aX = float(s.outputs.values['coef_xa'])
+        bX = float(s.outputs.values['coef_xb'])
+        cX = float(s.outputs.values['coef_xc'])
+        tmpVal = (aX*radBlueVal)-bX;
+        reflBlueVal = tmpVal/(1.0+cX*tmpVal)
 
+        outDist = abs(reflBlueVal - predBlueVal)
+        print("\taX: ", aX, " bX: ", bX, " cX: ", cX, "     Dist = ", outDist)
+        return outDist
+
+    def calcBlue6SCoeffLUT(self, aeroProfile, atmosProfile, grdRefl, elevVals, aotVals):
+        """
+        Run 6S for the blue band for each elevation (metres) and AOT value,
+        returning an array of shape (len(elevVals), len(aotVals), 3) with
+        the aX, bX and cX coefficients.
+        """
+        s = Py6S.SixS()
         s.atmos_profile = atmosProfile
         s.aero_profile = aeroProfile
         s.ground_reflectance = grdRefl
@@ -835,50 +725,87 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
         s.geometry.latitude = self.latCentre
         s.geometry.longitude = self.lonCentre
         s.altitudes = Py6S.Altitudes()
-        s.altitudes.set_target_custom_altitude(surfaceAltitude)
         s.altitudes.set_sensor_satellite_level()
         s.atmos_corr = Py6S.AtmosCorr.AtmosCorrLambertianFromRadiance(200)
-        s.aot550 = aotVal
-
-        # Band 1 (Blue!)
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_TM_B1)
-        s.run()
-        aX = float(s.outputs.values['coef_xa'])
-        bX = float(s.outputs.values['coef_xb'])
-        cX = float(s.outputs.values['coef_xc'])
-        tmpVal = (aX*radBlueVal)-bX;
-        reflBlueVal = tmpVal/(1.0+cX*tmpVal)
+        s.wavelength = LS5TM_BLUE_6S_WAVELENGTH
+
+        blueCoeffs = numpy.zeros((len(elevVals), len(aotVals), 3), dtype=numpy.float64)
+        for i, elevVal in enumerate(elevVals):
+            s.altitudes.set_target_custom_altitude(float(elevVal)/1000)
+            for j, aotVal in enumerate(aotVals):
+                print("Blue 6S LUT - Elevation: ", elevVal, " AOD: ", aotVal)
+                s.aot550 = aotVal
+                s.run()
+                blueCoeffs[i,j,0] = float(s.outputs.values['coef_xa'])
+                blueCoeffs[i,j,1] = float(s.outputs.values['coef_xb'])
+                blueCoeffs[i,j,2] = float(s.outputs.values['coef_xc'])
+        return blueCoeffs
+
+    def findAODValuesForSegments(self, radBlueVals, predBlueVals, elevVals, aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax):
+        """
+        For each segment find the AOD value, tested between aotValMin and
+        aotValMax in steps of 0.05, for which the blue radiance converted
+        to surface reflectance is closest to the predicted blue reflectance.
+        The 6S coefficients are calculated once on a 100 m elevation by AOD
+        grid and linearly interpolated to the segment elevations (metres),
+        so all segments and AOD values are tested together.
+        """
+        # A small tolerance stops float rounding (e.g. (0.2-0.05)/0.05 = 3.0000000000000004)
+        # adding an extra AOD value beyond aotValMax.
+        numAOTValTests = int(math.ceil(((aotValMax - aotValMin)/0.05) - 1e-9))+1
+        if not numAOTValTests >= 1:
+            raise ARCSIException("min and max AOT range are too close together, they need to be at least 0.05 apart.")
+        if radBlueVals.shape[0] == 0:
+            return numpy.zeros(0, dtype=numpy.float64)
+        aotTestVals = aotValMin + (0.05 * numpy.arange(numAOTValTests))
+
+        elevLUTMin = math.floor(numpy.min(elevVals)/100)*100
+        elevLUTMax = math.ceil(numpy.max(elevVals)/100)*100
+        elevLUTVals = numpy.arange(elevLUTMin, elevLUTMax+100, 100)
+        blueCoeffs = self.calcBlue6SCoeffLUT(aeroProfile, atmosProfile, grdRefl, elevLUTVals, aotTestVals)
+
+        if elevLUTVals.shape[0] == 1:
+            segCoeffs = numpy.repeat(blueCoeffs, radBlueVals.shape[0], axis=0)
+        else:
+            elevIdxs = numpy.clip(numpy.searchsorted(elevLUTVals, elevVals, side='right')-1, 0, elevLUTVals.shape[0]-2)
+            elevWeights = ((elevVals - elevLUTVals[elevIdxs]) / 100)[:, numpy.newaxis, numpy.newaxis]
+            segCoeffs = (blueCoeffs[elevIdxs] * (1.0 - elevWeights)) + (blueCoeffs[elevIdxs+1] * elevWeights)
 
-        outDist = math.sqrt(math.pow((reflBlueVal - predBlueVal),2))
-        print("\taX: ", aX, " bX: ", bX, " cX: ", cX, "     Dist = ", outDist)
-        return outDist
+        tmpVals = (segCoeffs[...,0] * radBlueVals[:, numpy.newaxis]) - segCoeffs[...,1]
+        reflBlueVals = tmpVals / (1.0 + (segCoeffs[...,2] * tmpVals))
+        aotDists = numpy.abs(reflBlueVals - predBlueVals[:, numpy.newaxis])
+        return aotTestVals[numpy.argmin(aotDists, axis=1)]
 
     def findDDVTargets(self, inputTOAImage, outputPath, outputName, outFormat, tmpPath):
         try:
             print("Finding dark targets.")
-            arcsiUtils = ARCSIUtils()
             tmpBaseName = os.path.splitext(outputName)[0]
-            thresImage = os.path.join(tmpPath, tmpBaseName+"_thresd"+arcsiUtils.getFileExtension(outFormat))
-            thresImageClumps = os.path.join(tmpPath, tmpBaseName+"_thresdclumps"+arcsiUtils.getFileExtension(outFormat))
-            thresImageClumpsRMSmall = os.path.join(tmpPath, tmpBaseName+"_thresdclumpsgt10"+arcsiUtils.getFileExtension(outFormat))
-            thresImageClumpsFinal = os.path.join(tmpPath, tmpBaseName+"_thresdclumpsFinal"+arcsiUtils.getFileExtension(outFormat))
-
-            percentiles = rsgislib.imagecalc.bandPercentile(inputTOAImage, 0.05, 0)
-            if percentiles[5] > 30:
-                b6Thres = str(percentiles[5])
+            imgExtension = ARCSIUtils.getFileExtension(outFormat)
+            thresImage = os.path.join(tmpPath, tmpBaseName+"_thresd"+imgExtension)
+            thresImageClumps = os.path.join(tmpPath, tmpBaseName+"_thresdclumps"+imgExtension)
+            thresImageClumpsRMSmall = os.path.join(tmpPath, tmpBaseName+"_thresdclumpsgt10"+imgExtension)
+            thresImageClumpsFinal = os.path.join(tmpPath, tmpBaseName+"_thresdclumpsFinal"+imgExtension)
+
+            # Only the SWIR2 (band 6) percentile is needed, so read just that band.
+            b6Percentile = ARCSIUtils.getIntBandPercentile(inputTOAImage, 6, 0.05, 0)
+            if b6Percentile > 30:
+                b6Thres = str(b6Percentile)
             else:
                 b6Thres = "30.0"
             print("SWIR DDV Threshold = ", b6Thres)
 
+            # NDVI > 0.1 is tested as 10*(b4-b3) > (b4+b3) to avoid a per pixel division.
             thresMathBands = list()
             thresMathBands.append(rsgislib.imagecalc.BandDefn(bandName='b3', fileName=inputTOAImage, bandIndex=3))
             thresMathBands.append(rsgislib.imagecalc.BandDefn(bandName='b4', fileName=inputTOAImage, bandIndex=4))
             thresMathBands.append(rsgislib.imagecalc.BandDefn(bandName='b6', fileName=inputTOAImage, bandIndex=6))
-            rsgislib.imagecalc.bandMath(thresImage, "(b6<" + b6Thres + ")&&(b6!=0)&&(((b4-b3)/(b4+b3))>0.1)?1:0", outFormat, rsgislib.TYPE_8UINT, thresMathBands)
-            rsgislib.segmentation.clump(thresImage, thresImageClumps, outFormat, False, 0.0)
+            rsgislib.imagecalc.bandMath(thresImage, "(b6<" + b6Thres + ")&&(b6!=0)&&((10*(b4-b3))>(b4+b3))?1:0", outFormat, rsgislib.TYPE_8UINT, thresMathBands)
+            # The clumping and relabelling are carried out in memory so the
+            # intermediate images are only written once.
+            rsgislib.segmentation.clump(thresImage, thresImageClumps, outFormat, True, 0.0)
             rsgislib.rastergis.populateStats(thresImageClumps, True, True)
             rsgislib.segmentation.rmSmallClumps(thresImageClumps, thresImageClumpsRMSmall, 100, outFormat)
-            rsgislib.segmentation.relabelClumps(thresImageClumpsRMSmall, thresImageClumpsFinal, outFormat, False)
+            rsgislib.segmentation.relabelClumps(thresImageClumpsRMSmall, thresImageClumpsFinal, outFormat, True)
             rsgislib.rastergis.populateStats(thresImageClumpsFinal, True, True)
 
             if not self.debugMode:
@@ -894,7 +821,6 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
     def estimateImageToAODUsingDDV(self, inputRADImage, inputTOAImage, inputDEMFile, shadowMask, outputPath, outputName, outFormat, tmpPath, aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax):
         print("Estimating AOD through Blue - SWIR relationship.")
         try:
-            arcsiUtils = ARCSIUtils()
 
             outputAOTImage = os.path.join(outputPath, outputName)
 
@@ -912,12 +838,9 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             stats2CalcRad.append(rsgislib.rastergis.BandAttStats(band=1, minField="MinB1RAD", meanField="MeanB1RAD"))
             rsgislib.rastergis.populateRATWithStats(inputRADImage, thresImageClumpsFinal, stats2CalcRad)
 
+            # Only the number of rows is needed to select all the clumps.
             ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
-            Histogram = rat.readColumn(ratDS, "Histogram")
-            MeanElev = rat.readColumn(ratDS, "MeanElev")
-
-            selected = Histogram * 2
-            selected[...] = 1
+            selected = numpy.ones(ratDS.GetRasterBand(1).GetDefaultRAT().GetRowCount(), dtype=numpy.uint8)
             selected[0] = 0
             rat.writeColumn(ratDS, "Selected", selected)
             ratDS = None
@@ -925,56 +848,30 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             rsgislib.rastergis.spatialLocation(thresImageClumpsFinal, "Eastings", "Northings")
             rsgislib.rastergis.selectClumpsOnGrid(thresImageClumpsFinal, "Selected", "PredictAOTFor", "Eastings", "Northings", "MinB7TOA", "min", 10, 10)
 
-            ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
-            MeanB1TOA = rat.readColumn(ratDS, "MeanB1TOA")
-            MeanB7TOA = rat.readColumn(ratDS, "MeanB7TOA")
-            MeanB1RAD = rat.readColumn(ratDS, "MeanB1RAD")
-            PredictAOTFor = rat.readColumn(ratDS, "PredictAOTFor")
+            # Read all the columns needed together while the RAT is open.
+            ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_ReadOnly)
+            MeanElev, MeanB7TOA, MeanB1RAD, PredictAOTFor, Eastings, Northings = [rat.readColumn(ratDS, colName) for colName in ("MeanElev", "MeanB7TOA", "MeanB1RAD", "PredictAOTFor", "Eastings", "Northings")]
+            ratDS = None
 
             PredB1Refl = (MeanB7TOA/1000) * 0.33
 
-            rat.writeColumn(ratDS, "PredB1Refl", PredB1Refl)
-
-            numAOTValTests = int(math.ceil((aotValMax - aotValMin)/0.05))+1
-
-            if not numAOTValTests >= 1:
-                raise ARCSIException("min and max AOT range are too close together, they need to be at least 0.05 apart.")
-
-            cAOT = aotValMin
-            cDist = 0.0
-            minAOT = 0.0
-            minDist = 0.0
-
-            aotVals = numpy.zeros_like(MeanB1RAD, dtype=numpy.float)
-
-            for i in range(len(MeanB1RAD)):
-                if PredictAOTFor[i] == 1:
-                    print("Predicting AOD for Segment ", i)
-                    for j in range(numAOTValTests):
-                        cAOT = aotValMin + (0.05 * j)
-                        cDist = self.run6SToOptimiseAODValue(cAOT, MeanB1RAD[i], PredB1Refl[i], aeroProfile, atmosProfile, grdRefl, MeanElev[i]/1000)
-                        if j == 0:
-                            minAOT = cAOT
-                            minDist = cDist
-                        elif cDist < minDist:
-                            minAOT = cAOT
-                            minDist = cDist
-                    #predAOTArgs = (MeanB1RAD[i], PredB1Refl[i], aeroProfile, atmosProfile, grdRefl, MeanElev[i])
-                    #res = minimize(self.run6SToOptimiseAODValue, minAOT, method='nelder-mead', options={'maxiter': 20, 'xtol': 0.001, 'disp': True}, args=predAOTArgs)
-                    #aotVals[i] = res.x[0]
-                    aotVals[i] = minAOT
-                    print("IDENTIFIED AOT: ", aotVals[i])
-                else:
-                    aotVals[i] = 0
-            rat.writeColumn(ratDS, "AOT", aotVals)
-
-            Eastings = rat.readColumn(ratDS, "Eastings")
-            Northings = rat.readColumn(ratDS, "Northings")
-            ratDS = None
+            aotVals = numpy.zeros(MeanB1RAD.shape, dtype=numpy.float32)
+            predictAOT = PredictAOTFor == 1
+            print("Predicting AOD for ", numpy.count_nonzero(predictAOT), " segments")
+            aotVals[predictAOT] = self.findAODValuesForSegments(MeanB1RAD[predictAOT], PredB1Refl[predictAOT], MeanElev[predictAOT], aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax)
 
-            Eastings = Eastings[PredictAOTFor!=0]
-            Northings = Northings[PredictAOTFor!=0]
-            aotVals = aotVals[PredictAOTFor!=0]
+            # The clumps image is deleted unless in debug mode, so the
+            # results are only written back to the RAT for inspection.
+            if self.debugMode:
+                ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
+                rat.writeColumn(ratDS, "PredB1Refl", PredB1Refl)
+                rat.writeColumn(ratDS, "AOT", aotVals)
+                ratDS = None
+
+            predictAOTIdxs = numpy.flatnonzero(PredictAOTFor != 0)
+            Eastings = Eastings[predictAOTIdxs]
+            Northings = Northings[predictAOTIdxs]
+            aotVals = aotVals[predictAOTIdxs]
 
             interpSmoothing = 10.0
             self.interpolateImageFromPointData(inputTOAImage, Eastings, Northings, aotVals, outputAOTImage, outFormat, interpSmoothing, True, 0.05)
@@ -989,11 +886,10 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
     def estimateImageToAODUsingDOS(self, inputRADImage, inputTOAImage, inputDEMFile, shadowMask, outputPath, outputName, outFormat, tmpPath, aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax, globalDOS, simpleDOS, dosOutRefl):
         try:
             print("Estimating AOD Using DOS")
-            arcsiUtils = ARCSIUtils()
 
             outputAOTImage = os.path.join(outputPath, outputName)
             tmpBaseName = os.path.splitext(outputName)[0]
-            imgExtension = arcsiUtils.getFileExtension(outFormat)
+            imgExtension = ARCSIUtils.getFileExtension(outFormat)
 
             dosBlueImage = ""
             minObjSize = 5
@@ -1025,69 +921,41 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
             rsgislib.rastergis.populateRATWithStats(inputRADImage, thresImageClumpsFinal, stats2CalcRad)
 
             ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
-            Histogram = rat.readColumn(ratDS, "Histogram")
-            MeanElev = rat.readColumn(ratDS, "MeanElev")
-
-            MeanB4RAD = rat.readColumn(ratDS, "MeanB4RAD")
-            MeanB3RAD = rat.readColumn(ratDS, "MeanB3RAD")
-
-            radNDVI = (MeanB4RAD - MeanB3RAD)/(MeanB4RAD + MeanB3RAD)
+            MeanB4RAD, MeanB3RAD = [rat.readColumn(ratDS, colName) for colName in ("MeanB4RAD", "MeanB3RAD")]
 
-            selected = Histogram * 2
-            selected[...] = 0
-            selected[radNDVI>0.2] = 1
+            # Select segments with NDVI > 0.2, the threshold is applied to the
+            # numerator to avoid the division (and divide by zero warnings).
+            radNDVIDenom = MeanB4RAD + MeanB3RAD
+            selected = numpy.zeros(MeanB4RAD.shape, dtype=numpy.uint8)
+            selected[((MeanB4RAD - MeanB3RAD) > (0.2 * radNDVIDenom)) & (radNDVIDenom > 0)] = 1
             rat.writeColumn(ratDS, "Selected", selected)
             ratDS = None
 
             rsgislib.rastergis.spatialLocation(thresImageClumpsFinal, "Eastings", "Northings")
             rsgislib.rastergis.selectClumpsOnGrid(thresImageClumpsFinal, "Selected", "PredictAOTFor", "Eastings", "Northings", "MeanB1DOS", "min", 10, 10)
 
-            ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
-            MeanB1DOS = rat.readColumn(ratDS, "MeanB1DOS")
-            MeanB1DOS = MeanB1DOS / 1000
-            MeanB1RAD = rat.readColumn(ratDS, "MeanB1RAD")
-            PredictAOTFor = rat.readColumn(ratDS, "PredictAOTFor")
-
-            numAOTValTests = int(math.ceil((aotValMax - aotValMin)/0.05))+1
-
-            if not numAOTValTests >= 1:
-                raise ARCSIException("min and max AOT range are too close together, they need to be at least 0.05 apart.")
-
-            cAOT = aotValMin
-            cDist = 0.0
-            minAOT = 0.0
-            minDist = 0.0
-
-            aotVals = numpy.zeros_like(MeanB1RAD, dtype=numpy.float)
-
-            for i in range(len(MeanB1RAD)):
-                if PredictAOTFor[i] == 1:
-                    print("Predicting AOD for Segment ", i)
-                    for j in range(numAOTValTests):
-                        cAOT = aotValMin + (0.05 * j)
-                        cDist = self.run6SToOptimiseAODValue(cAOT, MeanB1RAD[i], MeanB1DOS[i], aeroProfile, atmosProfile, grdRefl, MeanElev[i]/1000)
-                        if j == 0:
-                            minAOT = cAOT
-                            minDist = cDist
-                        elif cDist < minDist:
-                            minAOT = cAOT
-                            minDist = cDist
-                    #predAOTArgs = (MeanB1RAD[i], MeanB1DOS[i], aeroProfile, atmosProfile, grdRefl, MeanElev[i])
-                    #res = minimize(self.run6SToOptimiseAODValue, minAOT, method='nelder-mead', options={'maxiter': 20, 'xtol': 0.001, 'disp': True}, args=predAOTArgs)
-                    #aotVals[i] = res.x[0]
-                    aotVals[i] = minAOT
-                    print("IDENTIFIED AOT: ", aotVals[i])
-                else:
-                    aotVals[i] = 0
-            rat.writeColumn(ratDS, "AOT", aotVals)
-
-            Eastings = rat.readColumn(ratDS, "Eastings")
-            Northings = rat.readColumn(ratDS, "Northings")
+            # Read all the columns needed together while the RAT is open.
+            ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_ReadOnly)
+            MeanElev, MeanB1DOS, MeanB1RAD, PredictAOTFor, Eastings, Northings = [rat.readColumn(ratDS, colName) for colName in ("MeanElev", "MeanB1DOS", "MeanB1RAD", "PredictAOTFor", "Eastings", "Northings")]
             ratDS = None
+            MeanB1DOS = MeanB1DOS / 1000
+
+            aotVals = numpy.zeros(MeanB1RAD.shape, dtype=numpy.float32)
+            predictAOT = PredictAOTFor == 1
+            print("Predicting AOD for ", numpy.count_nonzero(predictAOT), " segments")
+            aotVals[predictAOT] = self.findAODValuesForSegments(MeanB1RAD[predictAOT], MeanB1DOS[predictAOT], MeanElev[predictAOT], aeroProfile, atmosProfile, grdRefl, aotValMin, aotValMax)
+
+            # The clumps image is deleted unless in debug mode, so the
+            # results are only written back to the RAT for inspection.
+            if self.debugMode:
+                ratDS = gdal.Open(thresImageClumpsFinal, gdal.GA_Update)
+                rat.writeColumn(ratDS, "AOT", aotVals)
+                ratDS = None
 
-            Eastings = Eastings[PredictAOTFor!=0]
-            Northings = Northings[PredictAOTFor!=0]
-            aotVals = aotVals[PredictAOTFor!=0]
+            predictAOTIdxs = numpy.flatnonzero(PredictAOTFor != 0)
+            Eastings = Eastings[predictAOTIdxs]
+            Northings = Northings[predictAOTIdxs]
+            aotVals = aotVals[predictAOTIdxs]
 
             interpSmoothing = 10.0
             self.interpolateImageFromPointData(inputTOAImage, Eastings, Northings, aotVals, outputAOTImage, outFormat, interpSmoothing, True, 0.05)
@@ -1119,5 +987,3 @@ class ARCSILandsat5TMSensor (ARCSIAbstractSensor):
 
     def cleanLocalFollowProcessing(self):
         print("")
-
-
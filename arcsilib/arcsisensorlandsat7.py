@@ -46,6 +46,8 @@ from .arcsisensor import ARCSIAbstractSensor
 from .arcsiexception import ARCSIException
 # Import the ARCSI utilities class
 from .arcsiutils import ARCSIUtils
+# Import the ARCSI per band array property helper
+from .arcsiutils import bandRangeProperty
 # Import the ARCSI landsat utilities class
 from .arcsiutils import ARCSILandsatMetaUtils
 # Import the datetime module
@@ -63,10 +65,14 @@ import rsgislib.imagecalibration
 import rsgislib.imageutils
 # Import the collections module
 import collections
+# Import the operator module
+import operator
 # Import the py6s module for running 6S from python.
 import Py6S
 # Import the python maths library
 import math
+# Import the python regular expressions module
+import re
 # Import the RIOS RAT library
 from rios import rat
 # Import the GDAL python library
@@ -75,30 +81,113 @@ import osgeo.gdal as gdal
 from scipy.optimize import minimize
 # Import the numpy module
 import numpy
-# Import the glob module
-import glob
-# Import the subprocess module
-import subprocess
+# Import the gzip module
+import gzip
+# Import the python multiprocessing module
+import multiprocessing
+import multiprocessing.pool
 # Import JSON module
 import json
 # Import the shutil module
 import shutil
 # Import the solar angle tools from RSGISLib
 import rsgislib.imagecalibration.solarangles
-# Using python-fmask (http://pythonfmask.org)
-import fmask.landsatangles
-import fmask.config
-import fmask.fmask
+# Import the RIOS image info module
 import rios.fileinfo
 
+# Matches the 'KEY = VALUE' lines of the MTL header file.
+LS7_MTL_LINE_RE = re.compile(r'^\s*([^=\s]+)\s*=([^=\n]*)$', re.M)
+
+# MTL band names in band order (1-5, 6 low and high gain, 7 and pan), as used in the collection and pre-collection keys.
+LS7_MTL_BANDS = (("1", "1"), ("2", "2"), ("3", "3"), ("4", "4"), ("5", "5"), ("6_VCID_1", "61"), ("6_VCID_2", "62"), ("7", "7"), ("8", "8"))
+
+# Per band MTL keys for the calibration and radiance ranges: (min, max, pre-collection min, pre-collection max).
+LS7_QCAL_KEYS = tuple(("QUANTIZE_CAL_MIN_BAND_{}".format(band), "QUANTIZE_CAL_MAX_BAND_{}".format(band), "QCALMIN_BAND{}".format(oldBand), "QCALMAX_BAND{}".format(oldBand)) for band, oldBand in LS7_MTL_BANDS)
+LS7_RAD_KEYS = tuple(("RADIANCE_MINIMUM_BAND_{}".format(band), "RADIANCE_MAXIMUM_BAND_{}".format(band), "LMIN_BAND{}".format(oldBand), "LMAX_BAND{}".format(oldBand)) for band, oldBand in LS7_MTL_BANDS)
+
+# Attributes for the band files given by the MTL FILE_NAME_BAND_1-8 keys, band 6 is split into low and high gain files.
+LS7_BAND_FILE_ATTRS = ("band1File", "band2File", "band3File", "band4File", "band5File", None, "band7File", "bandPanFile")
+
+# Band identifiers used in the per band attribute names (e.g. b6aCalMin), in the same order as LS7_MTL_BANDS.
+LS7_BAND_ATTR_IDS = ("1", "2", "3", "4", "5", "6a", "6b", "7", "8")
+
+# Names of the reflective and thermal bands and their index within the per band arrays, in output band order.
+LS7_REFL_BANDS = (("Blue", 0), ("Green", 1), ("Red", 2), ("NIR", 3), ("SWIR1", 4), ("SWIR2", 7))
+LS7_THERMAL_BAND_IDXS = (("ThermalB6a", 5), ("ThermalB6b", 6))
+
+# 6S wavelengths of the reflective bands, in output band order (1-5 and 7).
+LS7_6S_WAVELENGTHS = (Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B1, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B2,
+                      Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B3, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B4,
+                      Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B5, Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B7)
+
+# 6S outputs read for each band, in the column order of the 6S coefficients arrays.
+LS7_6S_COEFF_KEYS = operator.itemgetter('coef_xa', 'coef_xb', 'coef_xc', 'direct_solar_irradiance', 'diffuse_solar_irradiance', 'environmental_irradiance')
+
+# Band definition types passed to the RSGISLib calibration functions.
+LSBandRad = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
+LSBandSat = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
+LSBandThermal = collections.namedtuple('LSBand', ['bandName', 'bandIndex', 'k1', 'k2'])
+SolarIrradiance = collections.namedtuple('SolarIrradiance', ['irradiance'])
+
+# Solar irradiance for the six Landsat 7 ETM+ reflective bands.
+LS7_SOLAR_IRRADIANCE = (SolarIrradiance(irradiance=1997.0), SolarIrradiance(irradiance=1812.0), SolarIrradiance(irradiance=1533.0),
+                        SolarIrradiance(irradiance=1039.0), SolarIrradiance(irradiance=230.8), SolarIrradiance(irradiance=84.9))
+
+# Thermal band (6 low and high gain) brightness temperature constants.
+LS7_THERMAL_BANDS = (LSBandThermal(bandName="ThermalB6a", bandIndex=1, k1=666.09, k2=1282.71), LSBandThermal(bandName="ThermalB6b", bandIndex=2, k1=666.09, k2=1282.71))
+
+# Names and colours (red, green, blue) of the cloud mask classes, in class value order.
+LS7_CLOUD_CLASS_NAMES = numpy.array(['', 'Clouds', 'Shadows'], dtype=numpy.dtype('a255'))
+LS7_CLOUD_CLASS_RGB = numpy.array([[0, 0, 0], [0, 0, 255], [0, 255, 255]])
+
 class ARCSILandsat7Sensor (ARCSIAbstractSensor):
     """
     A class which represents the landsat 7 sensor to read
     header parameters and apply data processing operations.
     """
+    # Read-only aliases of the previous per band attribute names onto the per band range arrays.
+    b1CalMin = bandRangeProperty('calMin', 0)
+    b1CalMax = bandRangeProperty('calMax', 0)
+    b1MinRad = bandRangeProperty('radMin', 0)
+    b1MaxRad = bandRangeProperty('radMax', 0)
+    b2CalMin = bandRangeProperty('calMin', 1)
+    b2CalMax = bandRangeProperty('calMax', 1)
+    b2MinRad = bandRangeProperty('radMin', 1)
+    b2MaxRad = bandRangeProperty('radMax', 1)
+    b3CalMin = bandRangeProperty('calMin', 2)
+    b3CalMax = bandRangeProperty('calMax', 2)
+    b3MinRad = bandRangeProperty('radMin', 2)
+    b3MaxRad = bandRangeProperty('radMax', 2)
+    b4CalMin = bandRangeProperty('calMin', 3)
+    b4CalMax = bandRangeProperty('calMax', 3)
+    b4MinRad = bandRangeProperty('radMin', 3)
+    b4MaxRad = bandRangeProperty('radMax', 3)
+    b5CalMin = bandRangeProperty('calMin', 4)
+    b5CalMax = bandRangeProperty('calMax', 4)
+    b5MinRad = bandRangeProperty('radMin', 4)
+    b5MaxRad = bandRangeProperty('radMax', 4)
+    b6aCalMin = bandRangeProperty('calMin', 5)
+    b6aCalMax = bandRangeProperty('calMax', 5)
+    b6aMinRad = bandRangeProperty('radMin', 5)
+    b6aMaxRad = bandRangeProperty('radMax', 5)
+    b6bCalMin = bandRangeProperty('calMin', 6)
+    b6bCalMax = bandRangeProperty('calMax', 6)
+    b6bMinRad = bandRangeProperty('radMin', 6)
+    b6bMaxRad = bandRangeProperty('radMax', 6)
+    b7CalMin = bandRangeProperty('calMin', 7)
+    b7CalMax = bandRangeProperty('calMax', 7)
+    b7MinRad = bandRangeProperty('radMin', 7)
+    b7MaxRad = bandRangeProperty('radMax', 7)
+    b8CalMin = bandRangeProperty('calMin', 8)
+    b8CalMax = bandRangeProperty('calMax', 8)
+    b8MinRad = bandRangeProperty('radMin', 8)
+    b8MaxRad = bandRangeProperty('radMax', 8)
+
     def __init__(self, debugMode, inputImage):
         ARCSIAbstractSensor.__init__(self, debugMode, inputImage)
         self.sensor = "LS7"
+        # calc6SCoefficients runs 6S for all the bands at once.
+        self.num6SBandProcs = len(LS7_6S_WAVELENGTHS)
         self.band1File = ""
         self.band2File = ""
         self.band3File = ""
@@ -111,44 +200,21 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         self.bandQAFile = ""
         self.row = 0
         self.path = 0
-
-        self.b1CalMin = 0
-        self.b1CalMax = 0
-        self.b2CalMin = 0
-        self.b2CalMax = 0
-        self.b3CalMin = 0
-        self.b3CalMax = 0
-        self.b4CalMin = 0
-        self.b4CalMax = 0
-        self.b5CalMin = 0
-        self.b5CalMax = 0
-        self.b6aCalMin = 0
-        self.b6aCalMax = 0
-        self.b6bCalMin = 0
-        self.b6bCalMax = 0
-        self.b7CalMin = 0
-        self.b7CalMax = 0
-        self.b8CalMin = 0
-        self.b8CalMax = 0
-
-        self.b1MinRad = 0.0
-        self.b1MaxRad = 0.0
-        self.b2MinRad = 0.0
-        self.b2MaxRad = 0.0
-        self.b3MinRad = 0.0
-        self.b3MaxRad = 0.0
-        self.b4MinRad = 0.0
-        self.b4MaxRad = 0.0
-        self.b5MinRad = 0.0
-        self.b5MaxRad = 0.0
-        self.b6aMinRad = 0.0
-        self.b6aMaxRad = 0.0
-        self.b6bMinRad = 0.0
-        self.b6bMaxRad = 0.0
-        self.b7MinRad = 0.0
-        self.b7MaxRad = 0.0
-        self.b8MinRad = 0.0
-        self.b8MaxRad = 0.0
+        self.acquisitionDecimalHour = 0.0
+
+        # Per band calibration and radiance ranges from the header, in
+        # LS7_BAND_ATTR_IDS order, with the radiance gain and bias
+        # (L = gain * DN + bias) derived from them.
+        self.calMin = numpy.zeros(9)
+        self.calMax = numpy.zeros(9)
+        self.radMin = numpy.zeros(9)
+        self.radMax = numpy.zeros(9)
+        self.radGain = numpy.zeros(9)
+        self.radBias = numpy.zeros(9)
+
+        # 6S coefficients already calculated for this scene, keyed by the
+        # profiles, altitude, AOT and BRDF option they were calculated for.
+        self.sixsCoeffsCache = dict()
 
         self.sensorID = ""
         self.spacecraftID = ""
@@ -159,6 +225,11 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         self.gridCellSizeRefl = 0.0
         self.gridCellSizeTherm = 0.0
 
+    @property
+    def _bandFiles(self):
+        """The band files in LS7_BAND_ATTR_IDS order, read from the band file attributes."""
+        return (self.band1File, self.band2File, self.band3File, self.band4File, self.band5File, self.band6aFile, self.band6bFile, self.band7File, self.bandPanFile)
+
     def extractHeaderParameters(self, inputHeader, wktStr):
         """
         Understands and parses the Landsat MTL header files
@@ -168,19 +239,11 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
                 raise ARCSIException("Landsat sensor cannot accept a user specified image file - only the images in the header file will be used.")
             self.headerFileName = os.path.split(inputHeader)[1]
             
-            arcsiUtils = ARCSIUtils()
 
             print("Reading header file")
-            hFile = open(inputHeader, 'r')
-            headerParams = dict()
-            for line in hFile:
-                line = line.strip()
-                if line:
-                    lineVals = line.split('=')
-                    if len(lineVals) == 2:
-                        if (lineVals[0].strip() != "GROUP") or (lineVals[0].strip() != "END_GROUP"):
-                            headerParams[lineVals[0].strip()] = lineVals[1].strip().replace('"','')
-            hFile.close()
+            with open(inputHeader, 'r') as hFile:
+                headerTxt = hFile.read()
+            headerParams = {key: val.strip().replace('"','') for key, val in LS7_MTL_LINE_RE.findall(headerTxt) if key not in ("GROUP", "END_GROUP")}
             print("Extracting Header Values")
             # Get the sensor info.
             if ((headerParams["SPACECRAFT_ID"].upper() == "LANDSAT_7") or (headerParams["SPACECRAFT_ID"].upper() == "LANDSAT7")) and ((headerParams["SENSOR_ID"].upper() == "ETM") or (headerParams["SENSOR_ID"].upper() == "ETM+")):
@@ -192,90 +255,48 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
             self.spacecraftID = headerParams["SPACECRAFT_ID"]
 
             # Get row/path
-            try:
-                self.row = int(headerParams["WRS_ROW"])
-            except KeyError:
-                self.row = int(headerParams["STARTING_ROW"])
+            self.row = int(headerParams["WRS_ROW"] if "WRS_ROW" in headerParams else headerParams["STARTING_ROW"])
             self.path = int(headerParams["WRS_PATH"])
 
             # Get date and time of the acquisition
-            try:
-                acData = headerParams["DATE_ACQUIRED"].split('-')
-            except KeyError:
-                acData = headerParams["ACQUISITION_DATE"].split('-')
-            try:
-                acTime = headerParams["SCENE_CENTER_TIME"].split(':')
-            except KeyError:
-                acTime = headerParams["SCENE_CENTER_SCAN_TIME"].split(':')
+            acData = (headerParams["DATE_ACQUIRED"] if "DATE_ACQUIRED" in headerParams else headerParams["ACQUISITION_DATE"]).split('-')
+            acTime = (headerParams["SCENE_CENTER_TIME"] if "SCENE_CENTER_TIME" in headerParams else headerParams["SCENE_CENTER_SCAN_TIME"]).split(':')
             secsTime = acTime[2].split('.')
             self.acquisitionTime = datetime.datetime(int(acData[0]), int(acData[1]), int(acData[2]), int(acTime[0]), int(acTime[1]), int(secsTime[0]))
+            # GMT decimal hour of the acquisition, as used for the 6S geometry.
+            self.acquisitionDecimalHour = float(self.acquisitionTime.hour) + float(self.acquisitionTime.minute)/60.0
 
-            self.solarZenith = 90-arcsiUtils.str2Float(headerParams["SUN_ELEVATION"])
-            self.solarAzimuth = arcsiUtils.str2Float(headerParams["SUN_AZIMUTH"])
+            self.solarZenith = 90-ARCSIUtils.str2Float(headerParams["SUN_ELEVATION"])
+            self.solarAzimuth = ARCSIUtils.str2Float(headerParams["SUN_AZIMUTH"])
 
             # Get the geographic lat/long corners of the image.
             geoCorners = ARCSILandsatMetaUtils.getGeographicCorners(headerParams)
-
-            self.latTL = geoCorners[0]
-            self.lonTL = geoCorners[1]
-            self.latTR = geoCorners[2]
-            self.lonTR = geoCorners[3]
-            self.latBL = geoCorners[4]
-            self.lonBL = geoCorners[5]
-            self.latBR = geoCorners[6]
-            self.lonBR = geoCorners[7]
+            self.latTL, self.lonTL, self.latTR, self.lonTR, self.latBL, self.lonBL, self.latBR, self.lonBR = geoCorners
 
             # Get the projected X/Y corners of the image
             projectedCorners = ARCSILandsatMetaUtils.getProjectedCorners(headerParams)
-
-            self.xTL = projectedCorners[0]
-            self.yTL = projectedCorners[1]
-            self.xTR = projectedCorners[2]
-            self.yTR = projectedCorners[3]
-            self.xBL = projectedCorners[4]
-            self.yBL = projectedCorners[5]
-            self.xBR = projectedCorners[6]
-            self.yBR = projectedCorners[7]
+            self.xTL, self.yTL, self.xTR, self.yTR, self.xBL, self.yBL, self.xBR, self.yBR = projectedCorners
 
             # Get projection
-            inProj = osr.SpatialReference()
             if (headerParams["MAP_PROJECTION"] == "UTM"):
-                try:
-                    datum = headerParams["DATUM"]
-                    if datum != "WGS84":
-                        raise ARCSIException("Datum not recogised. Expected 'WGS84' got '{}'".format(datum))
-                except KeyError:
-                    pass
-                try:
-                    ellipsoid = headerParams["ELLIPSOID"]
-                    if ellipsoid != "WGS84":
-                        raise ARCSIException("Ellipsoid not recogised. Expected 'WGS84' got '{}'".format(ellipsoid))
-                except KeyError:
-                    pass
-                try:
-                    utmZone = int(headerParams["UTM_ZONE"])
-                except KeyError:
-                    utmZone = int(headerParams["ZONE_NUMBER"])
-                # FIXME: should this be hardcoded to north?
-                utmCode = "WGS84UTM" + str(utmZone) + str("N")
-                #print("UTM: ", utmCode)
-                inProj.ImportFromEPSG(self.epsgCodes[utmCode])
+                # The datum and ellipsoid are not always given, if they are they must be WGS84.
+                datum = headerParams.get("DATUM", "WGS84")
+                if datum != "WGS84":
+                    raise ARCSIException("Datum not recogised. Expected 'WGS84' got '{}'".format(datum))
+                ellipsoid = headerParams.get("ELLIPSOID", "WGS84")
+                if ellipsoid != "WGS84":
+                    raise ARCSIException("Ellipsoid not recogised. Expected 'WGS84' got '{}'".format(ellipsoid))
+                utmZone = int(headerParams["UTM_ZONE"] if "UTM_ZONE" in headerParams else headerParams["ZONE_NUMBER"])
+                inProj, latLongTrans = self.getUTMProjTransform(utmZone)
             elif (headerParams["MAP_PROJECTION"] == "PS") and (headerParams["DATUM"] == "WGS84") and (headerParams["ELLIPSOID"] == "WGS84"):
-                inProj.ImportFromWkt("PROJCS[\"PS WGS84\", GEOGCS[\"WGS 84\",DATUM[\"WGS_1984\",SPHEROID[\"WGS 84\",6378137,298.257223563, AUTHORITY[\"EPSG\",\"7030\"]],AUTHORITY[\"EPSG\",\"6326\"]],PRIMEM[\"Greenwich\",0],UNIT[\"degree\",0.0174532925199433],AUTHORITY[\"EPSG\",\"4326\"]],PROJECTION[\"Polar_Stereographic\"],PARAMETER[\"latitude_of_origin\",-71],PARAMETER[\"central_meridian\",0],PARAMETER[\"scale_factor\",1],PARAMETER[\"false_easting\",0],PARAMETER[\"false_northing\",0],UNIT[\"metre\",1,AUTHORITY[\"EPSG\",\"9001\"]]]")
+                inProj, latLongTrans = self.getPSProjTransform()
             else:
                 raise ARCSIException("Expecting Landsat to be projected in UTM or PolarStereographic (PS) with datum=WGS84 and ellipsoid=WGS84.")
 
-            if self.inWKT is "":
+            if not self.inWKT:
                 self.inWKT = inProj.ExportToWkt()
 
-            # Check image is square!
-            if not ((self.xTL == self.xBL) and (self.yTL == self.yTR) and (self.xTR == self.xBR) and (self.yBL == self.yBR)):
-                raise ARCSIException("Image is not square in projected coordinates.")
-
-            self.xCentre = self.xTL + ((self.xTR - self.xTL)/2)
-            self.yCentre = self.yBR + ((self.yTL - self.yBR)/2)
-
-            self.lonCentre, self.latCentre = arcsiUtils.getLongLat(inProj, self.xCentre, self.yCentre)
+            self.setProjCentreLatLong(latLongTrans)
 
             #print("Lat: " + str(self.latCentre) + " Long: " + str(self.lonCentre))
 
@@ -283,126 +304,59 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
 
             filesDIR = os.path.dirname(inputHeader)
 
-            self.band1File = os.path.join(filesDIR, metaFilenames[0])
-            self.band2File = os.path.join(filesDIR, metaFilenames[1])
-            self.band3File = os.path.join(filesDIR, metaFilenames[2])
-            self.band4File = os.path.join(filesDIR, metaFilenames[3])
-            self.band5File = os.path.join(filesDIR, metaFilenames[4])
-            self.band7File = os.path.join(filesDIR, metaFilenames[6])
-            self.bandPanFile = os.path.join(filesDIR, metaFilenames[7])
-            try:
+            # Band 6 has low and high gain files which are read separately below.
+            for bandFileAttr, metaFilename in zip(LS7_BAND_FILE_ATTRS, metaFilenames):
+                if bandFileAttr is not None:
+                    setattr(self, bandFileAttr, os.path.join(filesDIR, metaFilename))
+            if "FILE_NAME_BAND_QUALITY" in headerParams:
                 self.bandQAFile = os.path.join(filesDIR, headerParams["FILE_NAME_BAND_QUALITY"])
-            except KeyError:
+            else:
                 print("Warning - the quality band is not available. Are you using collection 1 data?")
                 self.bandQAFile = ""
 
-            try:
-                self.band6aFile = os.path.join(filesDIR,headerParams["FILE_NAME_BAND_6_VCID_1"])
-            except KeyError:
-                self.band6aFile = os.path.join(filesDIR,headerParams["BAND61_FILE_NAME"])
-            try:
-                self.band6bFile = os.path.join(filesDIR,headerParams["FILE_NAME_BAND_6_VCID_2"])
-            except KeyError:
-                self.band6bFile = os.path.join(filesDIR,headerParams["BAND62_FILE_NAME"])
-
-            bands_list = ["1","2","3","4","5","6_VCID_1","6_VCID_2","7","8"]
+            self.band6aFile = os.path.join(filesDIR, headerParams["FILE_NAME_BAND_6_VCID_1"] if "FILE_NAME_BAND_6_VCID_1" in headerParams else headerParams["BAND61_FILE_NAME"])
+            self.band6bFile = os.path.join(filesDIR, headerParams["FILE_NAME_BAND_6_VCID_2"] if "FILE_NAME_BAND_6_VCID_2" in headerParams else headerParams["BAND62_FILE_NAME"])
 
-            metaQCalMinList = {}
-            metaQCalMaxList = {}
-
-            for band_num in bands_list:
-                try:
-                    metaQCalMinList[band_num] = arcsiUtils.str2Float(headerParams["QUANTIZE_CAL_MIN_BAND_{}".format(band_num)], 1.0)
-                    metaQCalMaxList[band_num] = arcsiUtils.str2Float(headerParams["QUANTIZE_CAL_MAX_BAND_{}".format(band_num)], 255.0)
-                except KeyError:
-                    if band_num == "6_VCID_1":
-                        metaQCalMinList[band_num] = arcsiUtils.str2Float(headerParams["QCALMIN_BAND61"], 1.0)
-                        metaQCalMaxList[band_num] = arcsiUtils.str2Float(headerParams["QCALMAX_BAND61"], 255.0)
-                    elif band_num == "6_VCID_2":
-                        metaQCalMinList[band_num] = arcsiUtils.str2Float(headerParams["QCALMIN_BAND62"], 1.0)
-                        metaQCalMaxList[band_num] = arcsiUtils.str2Float(headerParams["QCALMAX_BAND62"], 255.0)
-                    else:
-                        metaQCalMinList[band_num] = arcsiUtils.str2Float(headerParams["QCALMIN_BAND{}".format(band_num)], 1.0)
-                        metaQCalMaxList[band_num] = arcsiUtils.str2Float(headerParams["QCALMAX_BAND{}".format(band_num)], 255.0)
-
-            self.b1CalMin = metaQCalMinList["1"]
-            self.b1CalMax = metaQCalMaxList["1"]
-            self.b2CalMin = metaQCalMinList["2"]
-            self.b2CalMax = metaQCalMaxList["2"]
-            self.b3CalMin = metaQCalMinList["3"]
-            self.b3CalMax = metaQCalMaxList["3"]
-            self.b4CalMin = metaQCalMinList["4"]
-            self.b4CalMax = metaQCalMaxList["4"]
-            self.b5CalMin = metaQCalMinList["5"]
-            self.b5CalMax = metaQCalMaxList["5"]
-            self.b6aCalMin = metaQCalMinList["6_VCID_1"]
-            self.b6aCalMax = metaQCalMaxList["6_VCID_1"]
-            self.b6bCalMin = metaQCalMinList["6_VCID_2"]
-            self.b6bCalMax = metaQCalMaxList["6_VCID_2"]
-            self.b7CalMin = metaQCalMinList["7"]
-            self.b7CalMax = metaQCalMaxList["7"]
-            self.b8CalMin = metaQCalMinList["8"]
-            self.b8CalMax = metaQCalMaxList["8"]
+            # Use the collection keys for a band if present, otherwise the pre-collection keys.
+            qCalKeys = [bandKeys[0:2] if (bandKeys[0] in headerParams) and (bandKeys[1] in headerParams) else bandKeys[2:4] for bandKeys in LS7_QCAL_KEYS]
+            self.calMin = numpy.array([ARCSIUtils.str2Float(headerParams[minKey], 1.0) for minKey, maxKey in qCalKeys], dtype=numpy.float64)
+            self.calMax = numpy.array([ARCSIUtils.str2Float(headerParams[maxKey], 255.0) for minKey, maxKey in qCalKeys], dtype=numpy.float64)
 
             lMin = [-6.200, -6.400, -5.000, -5.100, -1.000, 0.000, 3.200, -0.350, -4.700]
             lMax = [191.600, 196.500, 152.900, 241.100, 31.060, 17.040, 12.650, 10.800, 243.100]
-
-            metaRadMinList = {}
-            metaRadMaxList = {}
-
-            #for band_num in bands_list:
-            for i in range(0,9):
-                band_num = bands_list[i]
-                try:
-                    metaRadMinList[band_num] = arcsiUtils.str2Float(headerParams["RADIANCE_MINIMUM_BAND_{}".format(band_num)], lMin[i])
-                    metaRadMaxList[band_num] = arcsiUtils.str2Float(headerParams["RADIANCE_MAXIMUM_BAND_{}".format(band_num)], lMax[i])
-                except KeyError:
-                    if band_num == "6_VCID_1":
-                        metaRadMinList[band_num] = arcsiUtils.str2Float(headerParams["LMIN_BAND61"], lMin[i])
-                        metaRadMaxList[band_num] = arcsiUtils.str2Float(headerParams["LMAX_BAND61"], lMax[i])
-                    elif band_num == "6_VCID_2":
-                        metaRadMinList[band_num] = arcsiUtils.str2Float(headerParams["LMIN_BAND62"], lMin[i])
-                        metaRadMaxList[band_num] = arcsiUtils.str2Float(headerParams["LMAX_BAND62"], lMax[i])
-                    else:
-                        metaRadMinList[band_num] = arcsiUtils.str2Float(headerParams["LMIN_BAND{}".format(band_num)], lMin[i])
-                        metaRadMaxList[band_num] = arcsiUtils.str2Float(headerParams["LMAX_BAND{}".format(band_num)], lMax[i])
-
-            self.b1MinRad = metaRadMinList["1"]
-            self.b1MaxRad = metaRadMaxList["1"]
-            self.b2MinRad = metaRadMinList["2"]
-            self.b2MaxRad = metaRadMaxList["2"]
-            self.b3MinRad = metaRadMinList["3"]
-            self.b3MaxRad = metaRadMaxList["3"]
-            self.b4MinRad = metaRadMinList["4"]
-            self.b4MaxRad = metaRadMaxList["4"]
-            self.b5MinRad = metaRadMinList["5"]
-            self.b5MaxRad = metaRadMaxList["5"]
-            self.b6aMinRad = metaRadMinList["6_VCID_1"]
-            self.b6aMaxRad = metaRadMaxList["6_VCID_1"]
-            self.b6bMinRad = metaRadMinList["6_VCID_2"]
-            self.b6bMaxRad = metaRadMaxList["6_VCID_2"]
-            self.b7MinRad = metaRadMinList["7"]
-            self.b7MaxRad = metaRadMaxList["7"]
-            self.b8MinRad = metaRadMinList["8"]
-            self.b8MaxRad = metaRadMaxList["8"]
+            radKeys = [bandKeys[0:2] if (bandKeys[0] in headerParams) and (bandKeys[1] in headerParams) else bandKeys[2:4] for bandKeys in LS7_RAD_KEYS]
+            self.radMin = numpy.array([ARCSIUtils.str2Float(headerParams[minKey], errVal) for (minKey, maxKey), errVal in zip(radKeys, lMin)], dtype=numpy.float64)
+            self.radMax = numpy.array([ARCSIUtils.str2Float(headerParams[maxKey], errVal) for (minKey, maxKey), errVal in zip(radKeys, lMax)], dtype=numpy.float64)
+
+            # Only the reflective and thermal bands are converted to radiance, the
+            # gain and bias are left as zero for any other band without a cal range.
+            calRange = self.calMax - self.calMin
+            for bandName, i in LS7_REFL_BANDS + LS7_THERMAL_BAND_IDXS:
+                if not (calRange[i] > 0):
+                    raise ARCSIException("The calibration range for band {} is not valid (min: {}, max: {}).".format(LS7_BAND_ATTR_IDS[i], self.calMin[i], self.calMax[i]))
+            with numpy.errstate(divide='ignore', invalid='ignore'):
+                self.radGain = numpy.where(calRange > 0, (self.radMax - self.radMin) / calRange, 0.0)
+            self.radBias = self.radMin - (self.radGain * self.calMin)
 
             if "CLOUD_COVER" in headerParams:
-                self.cloudCover = arcsiUtils.str2Float(headerParams["CLOUD_COVER"], 0.0)
+                self.cloudCover = ARCSIUtils.str2Float(headerParams["CLOUD_COVER"], 0.0)
             if "CLOUD_COVER_LAND" in headerParams:
-                self.cloudCoverLand = arcsiUtils.str2Float(headerParams["CLOUD_COVER_LAND"], 0.0)
+                self.cloudCoverLand = ARCSIUtils.str2Float(headerParams["CLOUD_COVER_LAND"], 0.0)
             if "EARTH_SUN_DISTANCE" in headerParams:
-                self.earthSunDistance = arcsiUtils.str2Float(headerParams["EARTH_SUN_DISTANCE"], 0.0)
+                self.earthSunDistance = ARCSIUtils.str2Float(headerParams["EARTH_SUN_DISTANCE"], 0.0)
             if "GRID_CELL_SIZE_REFLECTIVE" in headerParams:
-                self.gridCellSizeRefl = arcsiUtils.str2Float(headerParams["GRID_CELL_SIZE_REFLECTIVE"], 60.0)
+                self.gridCellSizeRefl = ARCSIUtils.str2Float(headerParams["GRID_CELL_SIZE_REFLECTIVE"], 60.0)
             if "GRID_CELL_SIZE_THERMAL" in headerParams:
-                self.gridCellSizeTherm = arcsiUtils.str2Float(headerParams["GRID_CELL_SIZE_THERMAL"], 30.0)
+                self.gridCellSizeTherm = ARCSIUtils.str2Float(headerParams["GRID_CELL_SIZE_THERMAL"], 30.0)
             if "GRID_CELL_SIZE_PANCHROMATIC" in headerParams:
-                self.gridCellSizePan = arcsiUtils.str2Float(headerParams["GRID_CELL_SIZE_PANCHROMATIC"], 15.0)
+                self.gridCellSizePan = ARCSIUtils.str2Float(headerParams["GRID_CELL_SIZE_PANCHROMATIC"], 15.0)
 
             self.hasImageDataMask = True
 
-            # Read MTL header into python dict for python-fmask
-            self.fmaskMTLInfo = fmask.config.readMTLFile(inputHeader)
+            # python-fmask's readMTLFile just builds the same flat key/value
+            # dict from the MTL header, so reuse the parsed header rather
+            # than reading and parsing the file again.
+            self.fmaskMTLInfo = headerParams
 
             fileDateStr = headerParams["FILE_DATE"].strip()
             fileDateStr = fileDateStr.replace('Z', '')
@@ -474,13 +428,27 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         maskDIR = os.path.join(dataDIR, "gap_mask")
 
         if os.path.exists(maskDIR) and os.path.isdir(maskDIR):
-            maskList = glob.glob(os.path.join(maskDIR, "*.TIF.gz"))
+            # List the mask directory once, splitting out the compressed masks.
+            maskDIRFiles = [entry.path for entry in os.scandir(maskDIR) if not entry.name.startswith('.')]
+            maskList = [maskFile for maskFile in maskDIRFiles if maskFile.endswith(".TIF.gz")]
+            tifMaskList = [maskFile for maskFile in maskDIRFiles if maskFile.endswith(".TIF")]
             if len(maskList) > 0:
-               for file in maskList:
-                    cmd = "gzip -d " + file
-                    subprocess.call(cmd, shell=True)
+                def decompressMask(maskFile):
+                    # Equivalent to 'gzip -d', the compressed file is removed.
+                    with gzip.open(maskFile, 'rb') as gzMaskFile, open(maskFile[:-3], 'wb') as maskOutFile:
+                        shutil.copyfileobj(gzMaskFile, maskOutFile, 1024*1024)
+                    os.remove(maskFile)
+
+                # zlib releases the GIL while decompressing so the files are decompressed together.
+                pool = multiprocessing.pool.ThreadPool(processes=min(len(maskList), multiprocessing.cpu_count()))
+                try:
+                    pool.map(decompressMask, maskList)
+                finally:
+                    pool.close()
+                    pool.join()
+                tifMaskList = tifMaskList + [maskFile[:-3] for maskFile in maskList if maskFile[:-3] not in tifMaskList]
 
-            maskList = glob.glob(os.path.join(maskDIR, "*.TIF"))
+            maskList = tifMaskList
             if not len(maskList) > 0:
                 raise Exception("Could not find mask files.")
 
@@ -493,37 +461,40 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
                         stackImageMasks.append(rsgislib.imagecalc.BandDefn(bandImgIDs[bandIDIdx], imgMask, 1))
                         break
 
-            if not(len(stackImageMasks) == rsgisUtils.getImageBandCount(inputImage)):
+            # Open the input image once for both its band count and geotransform.
+            refImgDS = gdal.Open(inputImage, gdal.GA_ReadOnly)
+            if refImgDS is None:
+                raise ARCSIException('Could not open the input image: ' + inputImage)
+            numImgBands = refImgDS.RasterCount
+            geoTransform = refImgDS.GetGeoTransform()
+            refImgDS = None
+
+            if not(len(stackImageMasks) == numImgBands):
                 raise ARCSIException('Could not find image masks for all the input image bands')
     
             outputMaskImageInit = outputMaskImage
             if not outWKTFile is None:
                 outputMaskImageInit = os.path.join(outputPath, "InitMask_arcsi_" + outputMaskName)
 
-            rsgislib.imagecalc.bandMath(outputMaskImageInit, "GM_B1*GM_B2*GM_B3*GM_B4*GM_B5*GM_B7", outFormat, rsgislib.TYPE_8UINT, stackImageMasks)
+            # The gap masks are 0/1 so their logical AND is the combined mask.
+            rsgislib.imagecalc.bandMath(outputMaskImageInit, "GM_B1&&GM_B2&&GM_B3&&GM_B4&&GM_B5&&GM_B7", outFormat, rsgislib.TYPE_8UINT, stackImageMasks)
 
             if not outWKTFile is None:
-                refImgDS = gdal.Open(inputImage, gdal.GA_ReadOnly)
-                if refImgDS is None:
-                    raise ARCSIException('Could not open the input image: ' + inputImage)
-                geoTransform = refImgDS.GetGeoTransform()
                 if geoTransform is None:
                     raise ARCSIException('Could read the geotransform from the input image: ' + inputImage)
                 xPxlRes = geoTransform[1]
                 yPxlRes = geoTransform[5]
-                refImgDS = None
-                cmd = 'gdalwarp -t_srs ' + outWKTFile + ' -tr ' + str(xPxlRes) + ' ' + str(yPxlRes) + ' -ot Byte -wt Float32 ' \
-                    + '-r near -tap -srcnodata 0 -dstnodata 0 -of ' + outFormat + ' -overwrite ' \
-                    + outputMaskImageInit + ' ' + outputMaskImage
-                print(cmd)
-                try:
-                    subprocess.call(cmd, shell=True)
-                except OSError as e:
-                    raise ARCSIException('Could not re-projection image mask: ' + cmd)
+                # Same as 'gdalwarp -t_srs outWKTFile -tr x y -ot Byte -wt Float32 -r near -tap -srcnodata 0 -dstnodata 0'
+                print("Reprojecting image mask: " + outputMaskImage)
+                warpDS = gdal.Warp(outputMaskImage, outputMaskImageInit, format=outFormat, dstSRS=outWKTFile, xRes=xPxlRes, yRes=yPxlRes,
+                                   outputType=gdal.GDT_Byte, workingType=gdal.GDT_Float32, resampleAlg='near', targetAlignedPixels=True,
+                                   srcNodata=0, dstNodata=0, multithread=True)
+                if warpDS is None:
+                    raise ARCSIException('Could not re-projection image mask: ' + outputMaskImageInit)
+                warpDS = None
                 if not os.path.exists(outputMaskImage):
                     raise ARCSIException('Reprojected image mask is not present: ' + outputMaskImage)
                 else:
-                    rsgisUtils = rsgislib.RSGISPyUtils()
                     rsgisUtils.deleteFileWithBasename(outputMaskImageInit)
             else:
                 outputMaskImage = outputMaskImageInit
@@ -536,26 +507,18 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         return outputImage, outputMaskImage
 
     def expectedImageDataPresent(self):
-        imageDataPresent = True
-
-        if not os.path.exists(self.band1File):
-            imageDataPresent = False
-        if not os.path.exists(self.band2File):
-            imageDataPresent = False
-        if not os.path.exists(self.band3File):
-            imageDataPresent = False
-        if not os.path.exists(self.band4File):
-            imageDataPresent = False
-        if not os.path.exists(self.band5File):
-            imageDataPresent = False
-        if not os.path.exists(self.band6aFile):
-            imageDataPresent = False
-        if not os.path.exists(self.band6bFile):
-            imageDataPresent = False
-        if not os.path.exists(self.band7File):
-            imageDataPresent = False
-
-        return imageDataPresent
+        # The pan band is not used so is not required.
+        bandFiles = self._bandFiles[:-1]
+        bandDIRs = set(os.path.dirname(bandFile) for bandFile in bandFiles)
+        if len(bandDIRs) == 1:
+            # The bands are all next to the header, so list the directory
+            # once rather than stat each file (slow on network file systems).
+            bandDIR = bandDIRs.pop() or os.curdir
+            if not os.path.isdir(bandDIR):
+                return False
+            dirFiles = set(entry.name for entry in os.scandir(bandDIR))
+            return all(os.path.basename(bandFile) in dirFiles for bandFile in bandFiles)
+        return all(os.path.exists(bandFile) for bandFile in bandFiles)
 
     def mosaicImageTiles(self, outputPath):
         raise ARCSIException("Image data does not need mosaicking")
@@ -568,33 +531,45 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
 
     def generateValidImageDataMask(self, outputPath, outputMaskName, viewAngleImg, outFormat):
         print("Create the valid data mask")
+        outputImage = os.path.join(outputPath, outputMaskName)
+        # All the bands other than pan.
+        inImages = list(self._bandFiles[:-1])
+        if os.path.exists(viewAngleImg):
+            # The view angles are already available so the valid pixels and view
+            # angle threshold are combined in a single pass over the input bands.
+            # As with genValidMask below, a pixel is valid if any band is not 0.
+            bandDefns = [rsgislib.imagecalc.BandDefn('B{}'.format(i+1), inImage, 1) for i, inImage in enumerate(inImages)]
+            bandDefns.append(rsgislib.imagecalc.BandDefn('VA', viewAngleImg, 2))
+            expression = '(' + '||'.join(['({}!=0)'.format(bandDefn.bandName) for bandDefn in bandDefns[:-1]]) + ')&&(VA<14)?1:0'
+            rsgislib.imagecalc.bandMath(outputImage, expression, outFormat, rsgislib.TYPE_8UINT, bandDefns)
+            # Check there is valid data, only the pixels within the view angle
+            # threshold are counted as the pre-threshold mask is not written.
+            if rsgislib.imagecalc.countPxlsOfVal(outputImage, vals=[1])[0] == 0:
+                raise ARCSIException("There is no valid data within a view angle of 14 degrees in this image.")
+            return outputImage
+
         tmpBaseName = os.path.splitext(outputMaskName)[0]
         tmpValidPxlMsk = os.path.join(outputPath, tmpBaseName+'vldpxlmsk.kea')
-        outputImage = os.path.join(outputPath, outputMaskName)
-        inImages = [self.band1File, self.band2File, self.band3File, self.band4File, self.band5File, self.band7File, self.band6aFile, self.band6bFile]
         rsgislib.imageutils.genValidMask(inimages=inImages, outimage=tmpValidPxlMsk, gdalformat='KEA', nodata=0.0)
-        rsgislib.rastergis.populateStats(tmpValidPxlMsk, True, False, True)
         # Check there is valid data
-        ratDS = gdal.Open(tmpValidPxlMsk, gdal.GA_ReadOnly)
-        Histogram = rat.readColumn(ratDS, "Histogram")
-        ratDS = None
-        if Histogram.shape[0] < 2:
+        if rsgislib.imagecalc.countPxlsOfVal(tmpValidPxlMsk, vals=[1])[0] == 0:
             raise ARCSIException("There is no valid data in this image.")
-        if not os.path.exists(viewAngleImg):
-            print("Calculate Image Angles.")
-            imgInfo = rios.fileinfo.ImageInfo(tmpValidPxlMsk)
-            corners = fmask.landsatangles.findImgCorners(tmpValidPxlMsk, imgInfo)
-            nadirLine = fmask.landsatangles.findNadirLine(corners)
-            extentSunAngles = fmask.landsatangles.sunAnglesForExtent(imgInfo, self.fmaskMTLInfo)
-            satAzimuth = fmask.landsatangles.satAzLeftRight(nadirLine)
-            fmask.landsatangles.makeAnglesImage(tmpValidPxlMsk, viewAngleImg, nadirLine, extentSunAngles, satAzimuth, imgInfo)
-            dataset = gdal.Open(viewAngleImg, gdal.GA_Update)
-            if not dataset is None:
-                dataset.GetRasterBand(1).SetDescription("SatelliteAzimuth")
-                dataset.GetRasterBand(2).SetDescription("SatelliteZenith")
-                dataset.GetRasterBand(3).SetDescription("SolorAzimuth")
-                dataset.GetRasterBand(4).SetDescription("SolorZenith")
-            dataset = None
+        print("Calculate Image Angles.")
+        # python-fmask (http://pythonfmask.org) is only imported when it is needed.
+        import fmask.landsatangles
+        imgInfo = rios.fileinfo.ImageInfo(tmpValidPxlMsk)
+        corners = fmask.landsatangles.findImgCorners(tmpValidPxlMsk, imgInfo)
+        nadirLine = fmask.landsatangles.findNadirLine(corners)
+        extentSunAngles = fmask.landsatangles.sunAnglesForExtent(imgInfo, self.fmaskMTLInfo)
+        satAzimuth = fmask.landsatangles.satAzLeftRight(nadirLine)
+        fmask.landsatangles.makeAnglesImage(tmpValidPxlMsk, viewAngleImg, nadirLine, extentSunAngles, satAzimuth, imgInfo)
+        dataset = gdal.Open(viewAngleImg, gdal.GA_Update)
+        if not dataset is None:
+            dataset.GetRasterBand(1).SetDescription("SatelliteAzimuth")
+            dataset.GetRasterBand(2).SetDescription("SatelliteZenith")
+            dataset.GetRasterBand(3).SetDescription("SolorAzimuth")
+            dataset.GetRasterBand(4).SetDescription("SolorZenith")
+        dataset = None
         rsgislib.imagecalc.bandMath(outputImage, '(VA<14)&&(VM==1)?1:0', outFormat, rsgislib.TYPE_8UINT, [rsgislib.imagecalc.BandDefn('VA', viewAngleImg, 2), rsgislib.imagecalc.BandDefn('VM', tmpValidPxlMsk, 1)])
         rsgisUtils = rsgislib.RSGISPyUtils()
         rsgisUtils.deleteFileWithBasename(tmpValidPxlMsk)
@@ -604,23 +579,13 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         print("Converting to Radiance")
         outputReflImage = os.path.join(outputPath, outputReflName)
         outputThermalImage = None
-        bandDefnSeq = list()
-
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
-        bandDefnSeq.append(lsBand(bandName="Blue", fileName=self.band1File, bandIndex=1, lMin=self.b1MinRad, lMax=self.b1MaxRad, qCalMin=self.b1CalMin, qCalMax=self.b1CalMax))
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band2File, bandIndex=1, lMin=self.b2MinRad, lMax=self.b2MaxRad, qCalMin=self.b2CalMin, qCalMax=self.b2CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band3File, bandIndex=1, lMin=self.b3MinRad, lMax=self.b3MaxRad, qCalMin=self.b3CalMin, qCalMax=self.b3CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR", fileName=self.band4File, bandIndex=1, lMin=self.b4MinRad, lMax=self.b4MaxRad, qCalMin=self.b4CalMin, qCalMax=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR1", fileName=self.band5File, bandIndex=1, lMin=self.b5MinRad, lMax=self.b5MaxRad, qCalMin=self.b5CalMin, qCalMax=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR2", fileName=self.band7File, bandIndex=1, lMin=self.b7MinRad, lMax=self.b7MaxRad, qCalMin=self.b7CalMin, qCalMax=self.b7CalMax))
+        bandFiles = self._bandFiles
+        bandDefnSeq = [LSBandRad(bandName=bandName, fileName=bandFiles[i], bandIndex=1, lMin=self.radMin[i], lMax=self.radMax[i], qCalMin=self.calMin[i], qCalMax=self.calMax[i]) for bandName, i in LS7_REFL_BANDS]
         rsgislib.imagecalibration.landsat2Radiance(outputReflImage, outFormat, bandDefnSeq)
 
-        if not outputThermalName == None:
+        if outputThermalName is not None:
             outputThermalImage = os.path.join(outputPath, outputThermalName)
-            bandDefnSeq = list()
-            lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'lMin', 'lMax', 'qCalMin', 'qCalMax'])
-            bandDefnSeq.append(lsBand(bandName="ThermalB6a", fileName=self.band6aFile, bandIndex=1, lMin=self.b6aMinRad, lMax=self.b6aMaxRad, qCalMin=self.b6aCalMin, qCalMax=self.b6aCalMax))
-            bandDefnSeq.append(lsBand(bandName="ThermalB6b", fileName=self.band6bFile, bandIndex=1, lMin=self.b6bMinRad, lMax=self.b6bMaxRad, qCalMin=self.b6bCalMin, qCalMax=self.b6bCalMax))
+            bandDefnSeq = [LSBandRad(bandName=bandName, fileName=bandFiles[i], bandIndex=1, lMin=self.radMin[i], lMax=self.radMax[i], qCalMin=self.calMin[i], qCalMax=self.calMax[i]) for bandName, i in LS7_THERMAL_BAND_IDXS]
             rsgislib.imagecalibration.landsat2Radiance(outputThermalImage, outFormat, bandDefnSeq)
 
         return outputReflImage, outputThermalImage
@@ -629,16 +594,8 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         print("Generate Saturation Image")
         outputImage = os.path.join(outputPath, outputName)
 
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'fileName', 'bandIndex', 'satVal'])
-        bandDefnSeq = list()
-        bandDefnSeq.append(lsBand(bandName="Blue", fileName=self.band1File, bandIndex=1, satVal=self.b1CalMax))
-        bandDefnSeq.append(lsBand(bandName="Green", fileName=self.band2File, bandIndex=1, satVal=self.b2CalMax))
-        bandDefnSeq.append(lsBand(bandName="Red", fileName=self.band3File, bandIndex=1, satVal=self.b3CalMax))
-        bandDefnSeq.append(lsBand(bandName="NIR", fileName=self.band4File, bandIndex=1, satVal=self.b4CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR1", fileName=self.band5File, bandIndex=1, satVal=self.b5CalMax))
-        bandDefnSeq.append(lsBand(bandName="SWIR2", fileName=self.band7File, bandIndex=1, satVal=self.b7CalMax))
-        bandDefnSeq.append(lsBand(bandName="ThermalB6a", fileName=self.band6aFile, bandIndex=1, satVal=self.b6aCalMax))
-        bandDefnSeq.append(lsBand(bandName="ThermalB6b", fileName=self.band6bFile, bandIndex=1, satVal=self.b6bCalMax))
+        bandFiles = self._bandFiles
+        bandDefnSeq = [LSBandSat(bandName=bandName, fileName=bandFiles[i], bandIndex=1, satVal=self.calMax[i]) for bandName, i in LS7_REFL_BANDS + LS7_THERMAL_BAND_IDXS]
 
         rsgislib.imagecalibration.saturatedPixelsMask(outputImage, outFormat, bandDefnSeq)
 
@@ -647,26 +604,13 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
     def convertThermalToBrightness(self, inputRadImage, outputPath, outputName, outFormat, scaleFactor):
         print("Converting to Thermal Brightness")
         outputThermalImage = os.path.join(outputPath, outputName)
-        bandDefnSeq = list()
-
-        lsBand = collections.namedtuple('LSBand', ['bandName', 'bandIndex', 'k1', 'k2'])
-        bandDefnSeq.append(lsBand(bandName="ThermalB6a", bandIndex=1, k1=666.09, k2=1282.71))
-        bandDefnSeq.append(lsBand(bandName="ThermalB6b", bandIndex=2, k1=666.09, k2=1282.71))
-        rsgislib.imagecalibration.landsatThermalRad2Brightness(inputRadImage, outputThermalImage, outFormat, rsgislib.TYPE_32INT, scaleFactor, bandDefnSeq)
+        rsgislib.imagecalibration.landsatThermalRad2Brightness(inputRadImage, outputThermalImage, outFormat, rsgislib.TYPE_32INT, scaleFactor, list(LS7_THERMAL_BANDS))
         return outputThermalImage
 
     def convertImageToTOARefl(self, inputRadImage, outputPath, outputName, outFormat, scaleFactor):
         print("Converting to TOA")
         outputImage = os.path.join(outputPath, outputName)
-        solarIrradianceVals = list()
-        IrrVal = collections.namedtuple('SolarIrradiance', ['irradiance'])
-        solarIrradianceVals.append(IrrVal(irradiance=1997.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1812.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1533.0))
-        solarIrradianceVals.append(IrrVal(irradiance=1039.0))
-        solarIrradianceVals.append(IrrVal(irradiance=230.8))
-        solarIrradianceVals.append(IrrVal(irradiance=84.9))
-        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, solarIrradianceVals)
+        rsgislib.imagecalibration.radiance2TOARefl(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, self.acquisitionTime.year, self.acquisitionTime.month, self.acquisitionTime.day, self.solarZenith, list(LS7_SOLAR_IRRADIANCE))
         return outputImage
 
     def generateCloudMask(self, inputReflImage, inputSatImage, inputThermalImage, inputViewAngleImg, inputValidImg, outputPath, outputName, outFormat, tmpPath, scaleFactor, cloud_msk_methods=None):
@@ -684,12 +628,19 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
                 tmpDIRExisted = False
 
             if (cloud_msk_methods is None) or (cloud_msk_methods == 'FMASK'):
+                # python-fmask (http://pythonfmask.org) is only imported when it is needed.
+                import fmask.config
+                import fmask.fmask
                 tmpFMaskOut = os.path.join(tmpBaseDIR, tmpBaseName + '_pyfmaskout.kea')
 
+                # The thermal band is only resampled if its projection differs, and not
+                # even then if it is already on the same grid (e.g., the projections
+                # are equivalent but written differently). The brightness temperature
+                # is only thresholded by fmask so nearest neighbour is sufficient.
                 tmpThermalLayer = self.band6aFile
-                if not rsgisUtils.doGDALLayersHaveSameProj(inputThermalImage, self.band6aFile):
+                if not (rsgisUtils.doGDALLayersHaveSameProj(inputThermalImage, self.band6aFile) or ARCSIUtils.doImagesHaveSameGrid(inputThermalImage, self.band6aFile)):
                     tmpThermalLayer = os.path.join(tmpBaseDIR, tmpBaseName+'_thermalresample.kea')
-                    rsgislib.imageutils.resampleImage2Match(inputThermalImage, self.band6aFile, tmpThermalLayer, 'KEA', 'cubic', rsgislib.TYPE_32FLOAT)
+                    rsgislib.imageutils.resampleImage2Match(inputThermalImage, self.band6aFile, tmpThermalLayer, 'KEA', 'nearestneighbour', rsgislib.TYPE_32FLOAT)
 
                 minCloudSize = 0
                 cloudBufferDistance = 150
@@ -701,10 +652,10 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
                 fmaskFilenames.setSaturationMask(inputSatImage)
                 fmaskFilenames.setOutputCloudMaskFile(tmpFMaskOut)
 
-                thermalGain1040um = (self.b6aMaxRad - self.b6aMinRad) / (self.b6aCalMax - self.b6aCalMin)
-                thermalOffset1040um = self.b6aMinRad - self.b6aCalMin * thermalGain1040um
+                thermalGain1040um = float(self.radGain[5])
+                thermalOffset1040um = float(self.radBias[5])
                 thermalBand1040um = 0
-                thermalInfo = fmask.config.ThermalFileInfo(thermalBand1040um, thermalGain1040um, thermalOffset1040um, 666.09, 1282.71)
+                thermalInfo = fmask.config.ThermalFileInfo(thermalBand1040um, thermalGain1040um, thermalOffset1040um, LS7_THERMAL_BANDS[0].k1, LS7_THERMAL_BANDS[0].k2)
 
                 anglesInfo = fmask.config.AnglesFileInfo(inputViewAngleImg, 3, inputViewAngleImg, 2, inputViewAngleImg, 1, inputViewAngleImg, 0)
 
@@ -753,23 +704,14 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
                 red = rat.readColumn(ratDataset, 'Red')
                 green = rat.readColumn(ratDataset, 'Green')
                 blue = rat.readColumn(ratDataset, 'Blue')
-                ClassName = numpy.empty_like(red, dtype=numpy.dtype('a255'))
+                ClassName = numpy.zeros_like(red, dtype=numpy.dtype('a255'))
 
-                red[0] = 0
-                green[0] = 0
-                blue[0] = 0
-
-                if (red.shape[0] == 2) or (red.shape[0] == 3):
-                    red[1] = 0
-                    green[1] = 0
-                    blue[1] = 255
-                    ClassName[1] = 'Clouds'
-
-                    if(red.shape[0] == 3):
-                        red[2] = 0
-                        green[2] = 255
-                        blue[2] = 255
-                        ClassName[2] = 'Shadows'
+                # Set the colours and names of the classes present (no data, clouds and shadows).
+                nClasses = min(red.shape[0], LS7_CLOUD_CLASS_NAMES.shape[0])
+                red[:nClasses] = LS7_CLOUD_CLASS_RGB[:nClasses,0]
+                green[:nClasses] = LS7_CLOUD_CLASS_RGB[:nClasses,1]
+                blue[:nClasses] = LS7_CLOUD_CLASS_RGB[:nClasses,2]
+                ClassName[:nClasses] = LS7_CLOUD_CLASS_NAMES[:nClasses]
 
                 rat.writeColumn(ratDataset, "Red", red)
                 rat.writeColumn(ratDataset, "Green", green)
@@ -793,6 +735,11 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         return 4
 
     def calc6SCoefficients(self, aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal, useBRDF):
+        # The scene geometry is fixed, so the coefficients only depend on these parameters.
+        sixsCacheKey = (str(aeroProfile), str(atmosProfile), str(grdRefl), float(surfaceAltitude), float(aotVal), bool(useBRDF))
+        if sixsCacheKey in self.sixsCoeffsCache:
+            return self.sixsCoeffsCache[sixsCacheKey].copy()
+
         sixsCoeffs = numpy.zeros((6, 6), dtype=numpy.float32)
         # Set up 6S model
         s = Py6S.SixS()
@@ -802,7 +749,7 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         s.geometry = Py6S.Geometry.Landsat_TM()
         s.geometry.month = self.acquisitionTime.month
         s.geometry.day = self.acquisitionTime.day
-        s.geometry.gmt_decimal_hour = float(self.acquisitionTime.hour) + float(self.acquisitionTime.minute)/60.0
+        s.geometry.gmt_decimal_hour = self.acquisitionDecimalHour
         s.geometry.latitude = self.latCentre
         s.geometry.longitude = self.lonCentre
         s.altitudes = Py6S.Altitudes()
@@ -814,82 +761,21 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
             s.atmos_corr = Py6S.AtmosCorr.AtmosCorrLambertianFromRadiance(200)
         s.aot550 = aotVal
 
-        # Band 1
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B1)
-        s.run()
-        sixsCoeffs[0,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[0,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[0,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[0,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[0,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[0,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 2
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B2)
-        s.run()
-        sixsCoeffs[1,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[1,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[1,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[1,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[1,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[1,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 3
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B3)
-        s.run()
-        sixsCoeffs[2,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[2,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[2,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[2,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[2,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[2,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 4
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B4)
-        s.run()
-        sixsCoeffs[3,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[3,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[3,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[3,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[3,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[3,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 5
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B5)
-        s.run()
-        sixsCoeffs[4,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[4,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[4,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[4,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[4,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[4,5] = float(s.outputs.values['environmental_irradiance'])
-
-        # Band 7
-        s.wavelength = Py6S.Wavelength(Py6S.SixSHelpers.PredefinedWavelengths.LANDSAT_ETM_B7)
-        s.run()
-        sixsCoeffs[5,0] = float(s.outputs.values['coef_xa'])
-        sixsCoeffs[5,1] = float(s.outputs.values['coef_xb'])
-        sixsCoeffs[5,2] = float(s.outputs.values['coef_xc'])
-        sixsCoeffs[5,3] = float(s.outputs.values['direct_solar_irradiance'])
-        sixsCoeffs[5,4] = float(s.outputs.values['diffuse_solar_irradiance'])
-        sixsCoeffs[5,5] = float(s.outputs.values['environmental_irradiance'])
+        # Run 6S for the six reflective bands as a single batch. Each band is
+        # an independent 6S process so they are run concurrently.
+        wvlens, bandOutputs = Py6S.SixSHelpers.Wavelengths.run_wavelengths(s, LS7_6S_WAVELENGTHS, n=len(LS7_6S_WAVELENGTHS))
+        for i, bandOutput in enumerate(bandOutputs):
+            sixsCoeffs[i] = LS7_6S_COEFF_KEYS(bandOutput.values)
 
+        self.sixsCoeffsCache[sixsCacheKey] = sixsCoeffs.copy()
         return sixsCoeffs
 
     def convertImageToSurfaceReflSglParam(self, inputRadImage, outputPath, outputName, outFormat, aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal, useBRDF, scaleFactor):
         print("Converting to Surface Reflectance")
         outputImage = os.path.join(outputPath, outputName)
 
-        imgBandCoeffs = list()
-
         sixsCoeffs = self.calc6SCoefficients(aeroProfile, atmosProfile, grdRefl, surfaceAltitude, aotVal, useBRDF)
-
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-        imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
+        imgBandCoeffs = self.get6SBandCoeffs(sixsCoeffs)
 
         rsgislib.imagecalibration.apply6SCoeffSingleParam(inputRadImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, imgBandCoeffs)
 
@@ -904,19 +790,7 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
             elev6SCoeffsLUT = self.buildElevation6SCoeffLUT(aeroProfile, atmosProfile, grdRefl, aotVal, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax)
             print("LUT has been built.")
 
-            elevCoeffs = list()
-            for elevLUT in elev6SCoeffsLUT:
-                imgBandCoeffs = list()
-                sixsCoeffs = elevLUT.Coeffs
-                elevVal = elevLUT.Elev
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-                imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
-
-                elevCoeffs.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevVal), Coeffs=imgBandCoeffs))
+            elevCoeffs = [rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevLUT.Elev), Coeffs=self.get6SBandCoeffs(elevLUT.Coeffs)) for elevLUT in elev6SCoeffsLUT]
 
         rsgislib.imagecalibration.apply6SCoeffElevLUTParam(inputRadImage, inputDEMFile, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, elevCoeffs)
         return outputImage, elevCoeffs
@@ -929,23 +803,7 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
             print("Build an LUT for elevation and AOT values.")
             elevAOT6SCoeffsLUT = self.buildElevationAOT6SCoeffLUT(aeroProfile, atmosProfile, grdRefl, useBRDF, surfaceAltitudeMin, surfaceAltitudeMax, aotMin, aotMax)
 
-            elevAOTCoeffs = list()
-            for elevLUT in elevAOT6SCoeffsLUT:
-                elevVal = elevLUT.Elev
-                aotLUT = elevLUT.Coeffs
-                aot6SCoeffsOut = list()
-                for aotFeat in aotLUT:
-                    sixsCoeffs = aotFeat.Coeffs
-                    aotVal = aotFeat.AOT
-                    imgBandCoeffs = list()
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=1, aX=float(sixsCoeffs[0,0]), bX=float(sixsCoeffs[0,1]), cX=float(sixsCoeffs[0,2]), DirIrr=float(sixsCoeffs[0,3]), DifIrr=float(sixsCoeffs[0,4]), EnvIrr=float(sixsCoeffs[0,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=2, aX=float(sixsCoeffs[1,0]), bX=float(sixsCoeffs[1,1]), cX=float(sixsCoeffs[1,2]), DirIrr=float(sixsCoeffs[1,3]), DifIrr=float(sixsCoeffs[1,4]), EnvIrr=float(sixsCoeffs[1,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=3, aX=float(sixsCoeffs[2,0]), bX=float(sixsCoeffs[2,1]), cX=float(sixsCoeffs[2,2]), DirIrr=float(sixsCoeffs[2,3]), DifIrr=float(sixsCoeffs[2,4]), EnvIrr=float(sixsCoeffs[2,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=4, aX=float(sixsCoeffs[3,0]), bX=float(sixsCoeffs[3,1]), cX=float(sixsCoeffs[3,2]), DirIrr=float(sixsCoeffs[3,3]), DifIrr=float(sixsCoeffs[3,4]), EnvIrr=float(sixsCoeffs[3,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=5, aX=float(sixsCoeffs[4,0]), bX=float(sixsCoeffs[4,1]), cX=float(sixsCoeffs[4,2]), DirIrr=float(sixsCoeffs[4,3]), DifIrr=float(sixsCoeffs[4,4]), EnvIrr=float(sixsCoeffs[4,5])))
-                    imgBandCoeffs.append(rsgislib.imagecalibration.Band6SCoeff(band=6, aX=float(sixsCoeffs[5,0]), bX=float(sixsCoeffs[5,1]), cX=float(sixsCoeffs[5,2]), DirIrr=float(sixsCoeffs[5,3]), DifIrr=float(sixsCoeffs[5,4]), EnvIrr=float(sixsCoeffs[5,5])))
-                    aot6SCoeffsOut.append(rsgislib.imagecalibration.AOTLUTFeat(AOT=float(aotVal), Coeffs=imgBandCoeffs))
-                elevAOTCoeffs.append(rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevVal), Coeffs=aot6SCoeffsOut))
+            elevAOTCoeffs = [rsgislib.imagecalibration.ElevLUTFeat(Elev=float(elevLUT.Elev), Coeffs=[rsgislib.imagecalibration.AOTLUTFeat(AOT=float(aotFeat.AOT), Coeffs=self.get6SBandCoeffs(aotFeat.Coeffs)) for aotFeat in elevLUT.Coeffs]) for elevLUT in elevAOT6SCoeffsLUT]
 
         rsgislib.imagecalibration.apply6SCoeffElevAOTLUTParam(inputRadImage, inputDEMFile, inputAOTImage, outputImage, outFormat, rsgislib.TYPE_16UINT, scaleFactor, 0, True, elevAOTCoeffs)
 
@@ -962,7 +820,7 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
         s.geometry = Py6S.Geometry.Landsat_TM()
         s.geometry.month = self.acquisitionTime.month
         s.geometry.day = self.acquisitionTime.day
-        s.geometry.gmt_decimal_hour = float(self.acquisitionTime.hour) + float(self.acquisitionTime.minute)/60.0
+        s.geometry.gmt_decimal_hour = self.acquisitionDecimalHour
         s.geometry.latitude = self.latCentre
         s.geometry.longitude = self.lonCentre
         s.altitudes = Py6S.Altitudes()
@@ -1253,6 +1111,3 @@ class ARCSILandsat7Sensor (ARCSIAbstractSensor):
 
     def cleanLocalFollowProcessing(self):
         print("")
-
-
-
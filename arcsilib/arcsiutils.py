@@ -62,12 +62,17 @@ def ARCSIEnum(*sequential, **named):
     enums = dict(zip(sequential, range(len(sequential))), **named)
     return type('ARCSIEnum', (), enums)
 
+def bandRangeProperty(arrName, idx):
+    """Read-only property aliasing one element of a per band array attribute."""
+    return property(lambda self: getattr(self, arrName)[idx])
+
 class ARCSIUtils (object):
     """
     A class with useful utilties for the ARCSI System.
     """
 
-    def getFileExtension(self, format):
+    @staticmethod
+    def getFileExtension(format):
         ext = ".NA"
         if format.lower() == "kea":
             ext = ".kea"
@@ -307,7 +312,8 @@ class ARCSIUtils (object):
                 return False
         return True
 
-    def str2Float(self, strVal, errVal=None):
+    @staticmethod
+    def str2Float(strVal, errVal=None):
         strVal = str(strVal).strip()
         outFloat = 0.0
         try:
@@ -363,6 +369,73 @@ class ARCSIUtils (object):
             outVal = outVal + val
         return outVal / float(len(vals))
 
+    @staticmethod
+    def getIntBandPercentile(inputImage, band, percentile, noDataVal=None):
+        """
+        Get a percentile (0-1) of a single unsigned integer (8 or 16 bit) image
+        band, ignoring the no data value. The band is read a block of rows at
+        a time into a histogram of the values so only that band is read and the
+        whole band is not held in memory. The percentile is linearly interpolated
+        between values, as rsgislib.imagecalc.bandPercentile does.
+        """
+        dataset = gdal.Open(inputImage, gdal.GA_ReadOnly)
+        if dataset is None:
+            raise ARCSIException("Could not open image: '" + inputImage + "'")
+        imgBand = dataset.GetRasterBand(band)
+        if imgBand.DataType == gdal.GDT_Byte:
+            numVals = 256
+        elif imgBand.DataType == gdal.GDT_UInt16:
+            numVals = 65536
+        else:
+            raise ARCSIException("Band percentile can only be calculated for 8 or 16 bit unsigned integer images.")
+
+        histCounts = numpy.zeros(numVals, dtype=numpy.int64)
+        nRowsRead = max(imgBand.GetBlockSize()[1], 256)
+        for yOff in range(0, dataset.RasterYSize, nRowsRead):
+            blockData = imgBand.ReadAsArray(0, yOff, dataset.RasterXSize, min(nRowsRead, dataset.RasterYSize - yOff))
+            histCounts += numpy.bincount(blockData.ravel(), minlength=numVals)
+        dataset = None
+
+        if noDataVal is not None:
+            histCounts[int(noDataVal)] = 0
+        nPxls = histCounts.sum()
+        if nPxls == 0:
+            raise ARCSIException("There are no valid pixels in band {} of '{}'".format(band, inputImage))
+
+        # Values at the (zero based) sorted positions either side of the percentile.
+        cumCounts = numpy.cumsum(histCounts)
+        pctlPos = percentile * (nPxls - 1)
+        lowerPos = int(math.floor(pctlPos))
+        upperPos = min(lowerPos + 1, nPxls - 1)
+        lowerVal = float(numpy.searchsorted(cumCounts, lowerPos, side='right'))
+        upperVal = float(numpy.searchsorted(cumCounts, upperPos, side='right'))
+        return lowerVal + ((pctlPos - lowerPos) * (upperVal - lowerVal))
+
+    @staticmethod
+    def doImagesHaveSameGrid(inImg1, inImg2):
+        """
+        Check whether two images have the same pixel grid, i.e., the same
+        geotransform (origin and pixel size) and number of rows and columns.
+        The projections are not compared.
+        """
+        dataset1 = gdal.Open(inImg1, gdal.GA_ReadOnly)
+        if dataset1 is None:
+            raise ARCSIException("Could not open image: '" + inImg1 + "'")
+        dataset2 = gdal.Open(inImg2, gdal.GA_ReadOnly)
+        if dataset2 is None:
+            raise ARCSIException("Could not open image: '" + inImg2 + "'")
+        geoTransform1 = dataset1.GetGeoTransform()
+        geoTransform2 = dataset2.GetGeoTransform()
+        # The pixel sizes (and rotations) must be identical while the origins only
+        # need to agree to a small fraction of a pixel (to allow for rounding).
+        sameGrid = (dataset1.RasterXSize == dataset2.RasterXSize) and (dataset1.RasterYSize == dataset2.RasterYSize) and \
+                   (geoTransform1[1:3] == geoTransform2[1:3]) and (geoTransform1[4:6] == geoTransform2[4:6]) and \
+                   numpy.isclose(geoTransform1[0], geoTransform2[0], rtol=0, atol=abs(geoTransform1[1])*1e-3) and \
+                   numpy.isclose(geoTransform1[3], geoTransform2[3], rtol=0, atol=abs(geoTransform1[5])*1e-3)
+        dataset1 = None
+        dataset2 = None
+        return sameGrid
+
     def getLongLat(self, inProjObj, x, y):
         wgs84latlonProj = osr.SpatialReference()
         wgs84latlonProj.ImportFromEPSG(4326)